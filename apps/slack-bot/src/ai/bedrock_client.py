@@ -1,75 +1,121 @@
 import logging
 import traceback
+from collections.abc import Callable
+from typing import Any
 
+from ai.bedrock_invoker import BedrockTarget, get_bedrock_invoker
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
 
+class BedrockResponseError(Exception):
+    """Bedrockの応答から返答テキストを取得できない場合の例外"""
 
-def chat_with_bedrock_direct(user_message: str, conversation_history: list[dict[str, str]] | None = None) -> str:
+
+def generate_with_bedrock_direct(
+    user_message: str,
+    conversation_history: list[dict[str, str]] | None = None,
+    max_tokens: int | None = None,
+    on_usage: Callable[[int, int], None] | None = None,
+) -> str:
     """
-    Bedrock直接呼び出しでClaude 4を使って会話する
+    Bedrock直接呼び出しでClaude 4の返答を生成する（失敗時は例外を送出）
 
     Args:
         user_message: ユーザーのメッセージ
         conversation_history: 会話履歴のリスト
+        max_tokens: 最大出力トークン数（省略時は設定値）
+        on_usage: 入力・出力トークン数を受け取るコールバック
 
     Returns:
         str: Claudeの返答
+
+    Raises:
+        BedrockResponseError: 応答の形式が想定外の場合
+        Exception: Bedrockの呼び出しに失敗した場合
     """
-    try:
-        import json
-
-        import boto3
-
-        # Bedrock Runtimeクライアントを作成
-        bedrock = boto3.client("bedrock-runtime", region_name=settings.bedrock_region)
-
-        # メッセージを構築
-        messages = []
-
-        # 会話履歴がある場合は追加
-        if conversation_history:
-            # 最新20件の履歴を使用（コンテキストウィンドウに収まる範囲で）
-            recent_history = conversation_history[-20:]
-            logger.info(f"Using {len(recent_history)} messages from conversation history")
-            
-            for msg in recent_history:
-                if msg.get("role") == "user":
-                    messages.append({"role": "user", "content": msg.get("content", "")})
-                elif msg.get("role") == "assistant":
-                    messages.append({"role": "assistant", "content": msg.get("content", "")})
-
-        # 現在のユーザーメッセージを追加
-        messages.append({"role": "user", "content": user_message})
-
-        # リクエストボディを構築
-        request_body = {
-            "messages": messages,
-            "system": settings.system_prompt,
-            "max_tokens": settings.ai_max_tokens,
-            "temperature": settings.ai_temperature,
-            "anthropic_version": "bedrock-2023-05-31",
-        }
-
-        # Bedrockを呼び出し
-        response = bedrock.invoke_model(
-            modelId=settings.ai_model_id,
+    import json
+
+    # メッセージを構築
+    messages = []
+
+    # 会話履歴がある場合は追加
+    if conversation_history:
+        # 最新20件の履歴を使用（コンテキストウィンドウに収まる範囲で）
+        recent_history = conversation_history[-20:]
+        logger.info(f"Using {len(recent_history)} messages from conversation history")
+
+        for msg in recent_history:
+            if msg.get("role") == "user":
+                messages.append({"role": "user", "content": msg.get("content", "")})
+            elif msg.get("role") == "assistant":
+                messages.append({"role": "assistant", "content": msg.get("content", "")})
+
+    # 現在のユーザーメッセージを追加
+    messages.append({"role": "user", "content": user_message})
+
+    # リクエストボディを構築
+    request_body = {
+        "messages": messages,
+        "system": settings.system_prompt,
+        "max_tokens": max_tokens or settings.ai_max_tokens,
+        "temperature": settings.ai_temperature,
+        "anthropic_version": "bedrock-2023-05-31",
+    }
+
+    # Bedrockを呼び出し（複数リージョン・ヘッジ付き）
+    invoker = get_bedrock_invoker()
+
+    def invoke(target: BedrockTarget) -> dict[str, Any]:
+        response = invoker.client(target.region).invoke_model(
+            modelId=target.model_id,
             contentType="application/json",
             accept="application/json",
             body=json.dumps(request_body),
         )
+        # レスポンスボディの読み込みまでをレイテンシに含める
+        body = dict(json.loads(response["body"].read()))
+
+        # ヘッジで採用されなかった呼び出しも課金されるため、完了した呼び出しごとに通知する
+        usage = body.get("usage", {})
+        if on_usage:
+            on_usage(int(usage.get("input_tokens", 0)), int(usage.get("output_tokens", 0)))
+        return body
+
+    response_body = invoker.invoke(invoke)
+
+    # コンテンツを取得
+    if "content" in response_body and len(response_body["content"]) > 0:
+        return str(response_body["content"][0]["text"])
+
+    logger.error(f"Unexpected response format: {response_body}")
+    raise BedrockResponseError("Unexpected response format")
+
+
+def chat_with_bedrock_direct(
+    user_message: str,
+    conversation_history: list[dict[str, str]] | None = None,
+    max_tokens: int | None = None,
+    on_usage: Callable[[int, int], None] | None = None,
+) -> str:
+    """
+    Bedrock直接呼び出しでClaude 4を使って会話する（失敗時はエラーメッセージを返す）
+
+    Args:
+        user_message: ユーザーのメッセージ
+        conversation_history: 会話履歴のリスト
+        max_tokens: 最大出力トークン数（省略時は設定値）
+        on_usage: 入力・出力トークン数を受け取るコールバック
 
-        # レスポンスを解析
-        response_body = json.loads(response["body"].read())
+    Returns:
+        str: Claudeの返答
+    """
+    try:
+        return generate_with_bedrock_direct(user_message, conversation_history, max_tokens, on_usage)
 
-        # コンテンツを取得
-        if "content" in response_body and len(response_body["content"]) > 0:
-            return str(response_body["content"][0]["text"])
-        else:
-            logger.error(f"Unexpected response format: {response_body}")
-            return "申し訳ありません。応答の処理中にエラーが発生しました。"
+    except BedrockResponseError:
+        return "申し訳ありません。応答の処理中にエラーが発生しました。"
 
     except Exception as e:
         error_details = traceback.format_exc()
@@ -0,0 +1,280 @@
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, NamedTuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BedrockTarget(NamedTuple):
+    """呼び出し先のリージョンとモデルID（inference profile）"""
+
+    region: str
+    model_id: str
+
+
+def parse_targets(spec: str, default_model_id: str) -> list[BedrockTarget]:
+    """
+    呼び出し先の設定文字列をパース
+
+    Args:
+        spec: "region=model_id" または "region" をカンマ区切りで並べた文字列
+        default_model_id: model_idが省略された場合に使用するモデルID
+
+    Returns:
+        list: 呼び出し先のリスト（設定順）
+    """
+    targets = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        region, _, model_id = item.partition("=")
+        targets.append(BedrockTarget(region.strip(), model_id.strip() or default_model_id))
+    return targets
+
+
+class LatencyTracker:
+    """呼び出し先ごとのレイテンシをEWMAと直近のサンプルで記録する"""
+
+    def __init__(self, alpha: float = 0.3, window: int = 50, min_samples: int = 5) -> None:
+        """
+        Args:
+            alpha: EWMAの平滑化係数（大きいほど直近の値を重視）
+            window: パーセンタイル計算に使用する直近のサンプル数
+            min_samples: パーセンタイルを計算するのに必要な最小サンプル数
+        """
+        self.alpha = alpha
+        self.window = window
+        self.min_samples = min_samples
+        self._ewma: dict[BedrockTarget, float] = {}
+        self._samples: dict[BedrockTarget, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def _update_ewma(self, target: BedrockTarget, seconds: float) -> None:
+        previous = self._ewma.get(target)
+        self._ewma[target] = seconds if previous is None else self.alpha * seconds + (1 - self.alpha) * previous
+
+    def record(self, target: BedrockTarget, seconds: float) -> None:
+        """成功した呼び出しのレイテンシを記録"""
+        with self._lock:
+            self._update_ewma(target, seconds)
+            self._samples.setdefault(target, deque(maxlen=self.window)).append(seconds)
+
+    def record_failure(self, target: BedrockTarget, penalty: float) -> None:
+        """
+        失敗した呼び出しをEWMAのみに反映
+
+        ペナルティをパーセンタイルのサンプルに含めるとヘッジまでの待ち時間が延びてしまうため、
+        呼び出し先の優先順位にのみ影響させる。
+
+        Args:
+            target: 呼び出し先
+            penalty: EWMAに反映する秒数
+        """
+        with self._lock:
+            self._update_ewma(target, penalty)
+
+    def ewma(self, target: BedrockTarget) -> float | None:
+        """EWMAを取得（未計測の場合はNone）"""
+        with self._lock:
+            return self._ewma.get(target)
+
+    def percentile(self, target: BedrockTarget, percentile: float) -> float | None:
+        """直近のサンプルのパーセンタイル値を取得（サンプル不足の場合はNone）"""
+        with self._lock:
+            samples = sorted(self._samples.get(target, ()))
+        if len(samples) < self.min_samples:
+            return None
+        index = min(int(len(samples) * percentile / 100), len(samples) - 1)
+        return samples[index]
+
+
+class BedrockInvoker:
+    """複数リージョンへのヘッジ付きBedrock呼び出し
+
+    EWMAが最も小さい（速い）呼び出し先へ送信し、パーセンタイルに基づく待ち時間を過ぎても応答がない場合
+    または失敗した場合は次点の呼び出し先へ2つ目のリクエストを送信する。先に成功した結果を採用し、
+    もう一方は未開始であればキャンセル、実行中であれば結果を破棄する（レイテンシの記録には使用する）。
+    """
+
+    def __init__(
+        self,
+        targets: list[BedrockTarget],
+        hedge_enabled: bool = True,
+        hedge_percentile: float = 95,
+        hedge_min_delay: float = 2.0,
+        hedge_initial_delay: float = 10.0,
+        error_penalty: float = 30.0,
+        tracker: LatencyTracker | None = None,
+        max_workers: int = 8,
+    ) -> None:
+        """
+        Args:
+            targets: 呼び出し先のリスト（未計測時はこの順で優先）
+            hedge_enabled: ヘッジリクエストを送信するかどうか（呼び出し先が1つの場合は常に無効）
+            hedge_percentile: ヘッジまでの待ち時間に使用するレイテンシのパーセンタイル
+            hedge_min_delay: ヘッジまでの最小待ち時間（秒）
+            hedge_initial_delay: サンプル不足時のヘッジまでの待ち時間（秒）
+            error_penalty: 失敗時にレイテンシとして記録する秒数（スロットリング中のリージョンを避けるため）
+            tracker: レイテンシの記録先
+            max_workers: 同時に実行する呼び出しの最大数
+        """
+        if not targets:
+            raise ValueError("At least one Bedrock target is required")
+
+        self.targets = list(dict.fromkeys(targets))
+        # 同じ呼び出し先へのヘッジは負荷を倍にするだけなので、呼び出し先が複数ある場合のみ有効にする
+        self.hedge_enabled = hedge_enabled and len(self.targets) > 1
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_initial_delay = hedge_initial_delay
+        self.error_penalty = error_penalty
+        self.tracker = tracker or LatencyTracker()
+
+        # ヘッジで負けたリクエストの完了を待たずに返すため、withを使わずコンテナ内で使い回す
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bedrock-invoker")
+        self._clients: dict[str, Any] = {}
+        self._clients_lock = threading.Lock()
+        # ワーカースレッドごとのレイテンシ計測の開始時刻
+        self._timer = threading.local()
+
+    def client(self, region: str) -> Any:
+        """
+        リージョンごとのBedrock Runtimeクライアントを取得（コンテナ内で再利用）
+
+        Args:
+            region: AWSリージョン
+
+        Returns:
+            Bedrock Runtimeクライアント
+        """
+        with self._clients_lock:
+            if region not in self._clients:
+                import boto3
+
+                self._clients[region] = boto3.client("bedrock-runtime", region_name=region)
+            return self._clients[region]
+
+    def ranked_targets(self, available: Callable[[BedrockTarget], bool] | None = None) -> list[BedrockTarget]:
+        """
+        EWMAの小さい順に並べた呼び出し先（未計測のものは計測済みの後に設定順で並べる）
+
+        Args:
+            available: 呼び出し先がすぐに使用できるかを返す関数（使用中のものは最後に並べる）
+
+        Returns:
+            list: 優先順の呼び出し先
+        """
+        order = {target: i for i, target in enumerate(self.targets)}
+
+        def sort_key(target: BedrockTarget) -> tuple[bool, bool, float, int]:
+            ewma = self.tracker.ewma(target)
+            busy = available is not None and not available(target)
+            return busy, ewma is None, ewma or 0.0, order[target]
+
+        return sorted(self.targets, key=sort_key)
+
+    def hedge_delay(self, target: BedrockTarget) -> float:
+        """ヘッジリクエストを送信するまでの待ち時間（秒）"""
+        latency = self.tracker.percentile(target, self.hedge_percentile)
+        if latency is None:
+            return self.hedge_initial_delay
+        return max(latency, self.hedge_min_delay)
+
+    def restart_latency_timer(self) -> None:
+        """
+        実行中の呼び出しのレイテンシ計測を現在時刻から始め直す
+
+        callの中でロック待ちなど呼び出し先と無関係な待ち時間が発生した場合に、待機後に呼び出すことで
+        その時間をレイテンシに含めないようにする。
+        """
+        self._timer.started = time.monotonic()
+
+    def _submit(self, call: Callable[[BedrockTarget], T], target: BedrockTarget) -> Future[T]:
+        """呼び出しを実行し、完了時にレイテンシを記録する"""
+
+        def run() -> T:
+            self.restart_latency_timer()
+            try:
+                result = call(target)
+            except Exception:
+                self.tracker.record_failure(target, max(time.monotonic() - self._timer.started, self.error_penalty))
+                raise
+            self.tracker.record(target, time.monotonic() - self._timer.started)
+            return result
+
+        return self._executor.submit(run)
+
+    def invoke(
+        self, call: Callable[[BedrockTarget], T], available: Callable[[BedrockTarget], bool] | None = None
+    ) -> T:
+        """
+        呼び出し先を選択してcallを実行
+
+        Args:
+            call: 呼び出し先を受け取ってBedrockを呼び出す関数
+            available: 呼び出し先がすぐに使用できるかを返す関数（使用中の呼び出し先は後回しにする）
+
+        Returns:
+            最初に成功した呼び出しの結果
+        """
+        ranked = self.ranked_targets(available)
+        primary = ranked[0]
+        secondary = ranked[1] if len(ranked) > 1 else None
+
+        pending: dict[Future[T], BedrockTarget] = {self._submit(call, primary): primary}
+        hedged = False
+        errors: list[Exception] = []
+
+        while pending:
+            timeout = self.hedge_delay(primary) if self.hedge_enabled and not hedged else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                target = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.warning(f"Bedrock call failed in {target.region}: {e}")
+                    errors.append(e)
+                    continue
+
+                for loser, loser_target in pending.items():
+                    cancelled = loser.cancel()
+                    logger.info(f"Discarding hedged Bedrock call in {loser_target.region} (cancelled={cancelled})")
+                return result
+
+            # 別の呼び出し先があり、待ち時間を超過したか失敗した場合は2つ目のリクエストを送信
+            if secondary is not None and not hedged and ((not done and self.hedge_enabled) or errors):
+                hedged = True
+                logger.info(f"Sending hedged Bedrock call to {secondary.region} (primary: {primary.region})")
+                pending[self._submit(call, secondary)] = secondary
+
+        raise errors[-1]
+
+
+# グローバルインスタンス（Lambda環境での再利用のため）
+_bedrock_invoker: BedrockInvoker | None = None
+
+
+def get_bedrock_invoker() -> BedrockInvoker:
+    """設定に基づいてBedrockInvokerのシングルトンインスタンスを取得"""
+    global _bedrock_invoker
+    if _bedrock_invoker is None:
+        from config.settings import settings
+
+        _bedrock_invoker = BedrockInvoker(
+            parse_targets(settings.bedrock_targets, settings.ai_model_id),
+            hedge_enabled=settings.bedrock_hedge_enabled,
+            hedge_percentile=settings.bedrock_hedge_percentile,
+            hedge_min_delay=settings.bedrock_hedge_min_delay,
+            hedge_initial_delay=settings.bedrock_hedge_initial_delay,
+            tracker=LatencyTracker(alpha=settings.bedrock_latency_alpha),
+        )
+    return _bedrock_invoker
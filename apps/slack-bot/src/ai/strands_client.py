@@ -1,11 +1,15 @@
 import logging
 import os
+import threading
+from collections.abc import Callable
 from typing import Any
 
 from strands import Agent, tool
 from strands.models.bedrock import BedrockModel
 
+from ai.bedrock_invoker import BedrockInvoker, BedrockTarget, get_bedrock_invoker
 from config.settings import settings
+from memory.conversation_memory import ConversationMemory, get_conversation_memory
 
 logger = logging.getLogger(__name__)
 
@@ -75,23 +79,36 @@ class StrandsClient:
     def __init__(self):
         """Strands Agentを初期化"""
         try:
-            # BedrockModelを設定
-            self.model = BedrockModel(
-                model_id=settings.ai_model_id,
-                region_name=settings.bedrock_region,
-                temperature=settings.ai_temperature,
-                max_tokens=settings.ai_max_tokens,
-            )
-            
+            # 呼び出し先（リージョン・inference profile）の選択とヘッジはBedrockInvokerが行う
+            self.invoker: BedrockInvoker = get_bedrock_invoker()
+
             # ツールリストを定義
             tools = [search_web]
             
-            # Strands Agentを作成
-            self.agent = Agent(
-                model=self.model,
-                tools=tools,
-                system_prompt=settings.system_prompt,
-            )
+            # 呼び出し先ごとにBedrockModelとStrands Agentを作成
+            self.agents: dict[BedrockTarget, Agent] = {}
+            for target in self.invoker.targets:
+                model = BedrockModel(
+                    model_id=target.model_id,
+                    region_name=target.region,
+                    temperature=settings.ai_temperature,
+                    max_tokens=settings.ai_max_tokens,
+                )
+                self.agents[target] = Agent(
+                    model=model,
+                    tools=tools,
+                    system_prompt=settings.system_prompt,
+                )
+
+            # Agentは同時に実行できないため、ヘッジで負けた前回の呼び出しが残っている間は完了を待つ
+            self._agent_locks = {target: threading.Lock() for target in self.agents}
+
+            # Agentのメトリクスは累計のため、前回呼び出し時点の使用量を保持して差分を通知する
+            self._usage_totals: dict[BedrockTarget, tuple[int, int]] = {}
+            self._usage_lock = threading.Lock()
+
+            # 過去の会話メモリ（スレッドを跨いだ類似質問の参照用）
+            self.memory: ConversationMemory | None = get_conversation_memory() if settings.memory_enabled else None
             
             logger.info("Strands Agent initialized successfully")
             
@@ -99,42 +116,146 @@ class StrandsClient:
             logger.error(f"Failed to initialize Strands Agent: {e}")
             raise
     
-    def chat(self, user_message: str, conversation_history: list[dict[str, str]] | None = None) -> str:
+    def chat(
+        self,
+        user_message: str,
+        conversation_history: list[dict[str, str]] | None = None,
+        on_usage: Callable[[int, int], None] | None = None,
+        channel: str | None = None,
+        memory_query: str | None = None,
+    ) -> str:
         """
         Strands Agentを使ってユーザーメッセージに応答
         
         Args:
             user_message: ユーザーのメッセージ
-            conversation_history: 会話履歴（Strands Agentが自動管理するため、主に互換性のため保持）
+            conversation_history: スレッドの会話履歴（プロンプトに含めてAgentに渡す）
+            on_usage: 入力・出力トークン数を受け取るコールバック
+            channel: SlackチャンネルID（指定時のみ同じチャンネルの会話メモリを参照・記録）
+            memory_query: 会話メモリの検索・記録に使う質問（省略時はuser_message）
             
         Returns:
             AIの応答テキスト
         """
         try:
-            # Strands Agentで処理
-            result = self.agent(user_message)
-            
-            # 結果からテキストを抽出
-            if hasattr(result, 'content'):
-                if isinstance(result.content, str):
-                    return result.content
-                elif isinstance(result.content, list):
-                    # コンテンツリストからテキストを抽出
-                    text_parts = []
-                    for block in result.content:
-                        if isinstance(block, dict) and "text" in block:
-                            text_parts.append(block["text"])
-                        elif isinstance(block, str):
-                            text_parts.append(block)
-                    return "\n".join(text_parts) if text_parts else str(result)
-            
-            # フォールバック: 結果を文字列に変換
-            return str(result)
+            # 過去の類似するやり取りとスレッドの会話履歴をコンテキストとして追加
+            memory_query = memory_query or user_message
+            memory_context = self._recall_memory(channel, memory_query)
+            prompt = self._build_prompt(user_message, conversation_history, memory_context)
+
+            # Strands Agentで処理（複数リージョン・ヘッジ付き）
+            def invoke(target: BedrockTarget) -> str:
+                with self._agent_locks[target]:
+                    # 前回のヘッジで負けた呼び出しの完了待ちはリージョンのレイテンシに含めない
+                    self.invoker.restart_latency_timer()
+                    # 別のスレッド・チャンネルの会話を持ち越さないよう、文脈はプロンプトのみで渡す
+                    self.agents[target].messages = []
+                    result = self.agents[target](prompt)
+                    input_tokens, output_tokens = self._usage_delta(target, result)
+                # ヘッジで採用されなかった呼び出しも課金されるため、完了した呼び出しごとに通知する
+                if on_usage:
+                    on_usage(input_tokens, output_tokens)
+                return self._extract_text(result)
+
+            # 前回の呼び出しが残っていて使用中のAgentは後回しにする
+            response_text = self.invoker.invoke(invoke, available=lambda target: not self._agent_locks[target].locked())
+
+            # 完了したやり取りをメモリに記録
+            self._remember(channel, memory_query, response_text)
+
+            return response_text
             
         except Exception as e:
             logger.error(f"Error in Strands Agent chat: {e}")
             return f"申し訳ありません。AI処理中にエラーが発生しました: {str(e)}"
 
+    def _build_prompt(
+        self, user_message: str, conversation_history: list[dict[str, str]] | None, memory_context: str
+    ) -> str:
+        """
+        Agentに渡すプロンプトを組み立てる
+
+        Args:
+            user_message: ユーザーのメッセージ
+            conversation_history: スレッドの会話履歴（ユーザーの発言は発言者名付き）
+            memory_context: 会話メモリから取得したコンテキスト
+
+        Returns:
+            str: プロンプト
+        """
+        sections = []
+        if memory_context:
+            sections.append(memory_context)
+
+        if conversation_history:
+            # 最新20件の履歴を使用（Bedrock直接呼び出しと同じ範囲）
+            lines = ["このスレッドのこれまでの会話:"]
+            for msg in conversation_history[-20:]:
+                role = "assistant" if msg.get("role") == "assistant" else "user"
+                lines.append(f"[{role}] {msg.get('content', '')}")
+            sections.append("\n".join(lines))
+
+        if not sections:
+            return user_message
+        return "\n\n".join([*sections, f"質問: {user_message}"])
+
+    def _recall_memory(self, channel: str | None, query: str) -> str:
+        """会話メモリからコンテキストを取得（失敗しても応答を妨げないよう空文字を返す）"""
+        if not self.memory or not channel:
+            return ""
+        try:
+            return self.memory.build_context(channel, query)
+        except Exception as e:
+            logger.warning(f"Failed to recall conversation memory: {e}")
+            return ""
+
+    def _remember(self, channel: str | None, query: str, response_text: str) -> None:
+        """会話メモリにやり取りを記録（失敗しても応答は返す）"""
+        if not self.memory or not channel:
+            return
+        try:
+            self.memory.remember(channel, query, response_text)
+        except Exception as e:
+            logger.warning(f"Failed to store conversation memory: {e}")
+
+    def _usage_delta(self, target: BedrockTarget, result: Any) -> tuple[int, int]:
+        """
+        今回の呼び出し分のトークン使用量を取得
+
+        AgentResult.metrics.accumulated_usage はAgentの生成以降の累計のため、前回の累計との差分を返す。
+
+        Args:
+            target: 呼び出したAgentの呼び出し先
+            result: Strands Agentの結果
+
+        Returns:
+            tuple: (入力トークン数, 出力トークン数)
+        """
+        usage = getattr(getattr(result, "metrics", None), "accumulated_usage", None) or {}
+        total_in, total_out = int(usage.get("inputTokens", 0)), int(usage.get("outputTokens", 0))
+        with self._usage_lock:
+            previous_in, previous_out = self._usage_totals.get(target, (0, 0))
+            self._usage_totals[target] = (max(total_in, previous_in), max(total_out, previous_out))
+        return max(total_in - previous_in, 0), max(total_out - previous_out, 0)
+
+    def _extract_text(self, result: Any) -> str:
+        """Strands Agentの結果からテキストを抽出"""
+        if hasattr(result, 'content'):
+            if isinstance(result.content, str):
+                return result.content
+            elif isinstance(result.content, list):
+                # コンテンツリストからテキストを抽出
+                text_parts = []
+                for block in result.content:
+                    if isinstance(block, dict) and "text" in block:
+                        text_parts.append(block["text"])
+                    elif isinstance(block, str):
+                        text_parts.append(block)
+                return "\n".join(text_parts) if text_parts else str(result)
+
+        # フォールバック: 結果を文字列に変換
+        return str(result)
+
 
 # グローバルインスタンス（Lambda環境での再利用のため）
 _strands_client = None
@@ -147,16 +268,25 @@ def get_strands_client() -> StrandsClient:
     return _strands_client
 
 
-def chat_with_strands(user_message: str, conversation_history: list[dict[str, str]] | None = None) -> str:
+def chat_with_strands(
+    user_message: str,
+    conversation_history: list[dict[str, str]] | None = None,
+    on_usage: Callable[[int, int], None] | None = None,
+    channel: str | None = None,
+    memory_query: str | None = None,
+) -> str:
     """
     Strands Agentを使って会話（既存のAPIと互換性保持）
     
     Args:
         user_message: ユーザーのメッセージ
-        conversation_history: 会話履歴（互換性のため保持）
+        conversation_history: スレッドの会話履歴
+        on_usage: 入力・出力トークン数を受け取るコールバック
+        channel: SlackチャンネルID（会話メモリのスコープ）
+        memory_query: 会話メモリの検索・記録に使う質問（省略時はuser_message）
         
     Returns:
         str: AIの返答
     """
     client = get_strands_client()
-    return client.chat(user_message, conversation_history)
\ No newline at end of file
+    return client.chat(user_message, conversation_history, on_usage, channel, memory_query)
\ No newline at end of file
@@ -53,6 +53,44 @@ class Settings:
         self.ai_max_tokens = int(os.environ.get("AI_MAX_TOKENS", "1000"))
         self.ai_temperature = float(os.environ.get("AI_TEMPERATURE", "0.7"))
 
+        # Bedrock呼び出し先設定（"region=model_id" のカンマ区切り、model_id省略時はAI_MODEL_ID）
+        self.bedrock_targets = os.environ.get("BEDROCK_TARGETS", f"{self.bedrock_region}={self.ai_model_id}")
+        self.bedrock_hedge_enabled = os.environ.get("BEDROCK_HEDGE_ENABLED", "true").lower() == "true"
+        self.bedrock_hedge_percentile = float(os.environ.get("BEDROCK_HEDGE_PERCENTILE", "95"))
+        self.bedrock_hedge_min_delay = float(os.environ.get("BEDROCK_HEDGE_MIN_DELAY", "2.0"))
+        self.bedrock_hedge_initial_delay = float(os.environ.get("BEDROCK_HEDGE_INITIAL_DELAY", "10.0"))
+        self.bedrock_latency_alpha = float(os.environ.get("BEDROCK_LATENCY_ALPHA", "0.3"))
+
+        # 会話メモリ設定（過去のやり取りを検索してコンテキストに追加）
+        self.memory_enabled = os.environ.get("MEMORY_ENABLED", "true").lower() == "true"
+        self.memory_embedder = os.environ.get("MEMORY_EMBEDDER", "hashing")
+        self.memory_embedding_model_id = os.environ.get("MEMORY_EMBEDDING_MODEL_ID", "amazon.titan-embed-text-v2:0")
+        self.memory_max_entries = int(os.environ.get("MEMORY_MAX_ENTRIES", "1000"))
+        self.memory_top_k = int(os.environ.get("MEMORY_TOP_K", "3"))
+        self.memory_min_score = float(os.environ.get("MEMORY_MIN_SCORE", "0.5"))
+
+        # トークン使用量の予算設定（0以下で無制限）
+        self.usage_db_path = os.environ.get("USAGE_DB_PATH", "/tmp/token_usage.sqlite3")
+        self.usage_user_daily_budget = int(os.environ.get("USAGE_USER_DAILY_BUDGET", "100000"))
+        self.usage_channel_daily_budget = int(os.environ.get("USAGE_CHANNEL_DAILY_BUDGET", "500000"))
+        self.usage_degrade_ratio = float(os.environ.get("USAGE_DEGRADE_RATIO", "0.8"))
+        self.usage_degraded_max_tokens = int(os.environ.get("USAGE_DEGRADED_MAX_TOKENS", "300"))
+
+        # 返信コンテキストのキャッシュ設定（アクションボタンからの再生成用）
+        self.reply_cache_ttl = float(os.environ.get("REPLY_CACHE_TTL", "3600"))
+        self.reply_cache_max_entries = int(os.environ.get("REPLY_CACHE_MAX_ENTRIES", "200"))
+
+        # ユーザー表示名の解決設定
+        self.user_cache_ttl = float(os.environ.get("USER_CACHE_TTL", "3600"))
+        self.user_lookup_max_workers = int(os.environ.get("USER_LOOKUP_MAX_WORKERS", "8"))
+        self.user_lookup_failure_ttl = float(os.environ.get("USER_LOOKUP_FAILURE_TTL", "300"))
+
+        # プロファイリング設定（PROFILING_ENABLEDまたは署名付きデバッグフラグで有効化）
+        self.profiling_enabled = os.environ.get("PROFILING_ENABLED", "false").lower() == "true"
+        self.profiling_secret = os.environ.get("PROFILING_SECRET")
+        self.profiling_dump_dir = os.environ.get("PROFILING_DUMP_DIR", "")
+        self.profiling_top_n = int(os.environ.get("PROFILING_TOP_N", "15"))
+
         # システムプロンプト
         self.system_prompt = os.environ.get(
             "AI_SYSTEM_PROMPT",
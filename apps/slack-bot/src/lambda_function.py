@@ -6,8 +6,9 @@ from typing import Any
 
 from config.settings import settings
 from slack.auth import verify_slack_signature
-from slack.handler import handle_app_mention
+from slack.handler import handle_app_mention, prepare_block_action, process_block_action
 from utils.http_response import create_response
+from utils.profiling import profile_invocation, verify_debug_flag
 
 # OpenTelemetryの基本設定（テレメトリーは無効化）
 os.environ["OTEL_SDK_DISABLED"] = "true"
@@ -19,15 +20,73 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 自己非同期呼び出しで渡すジョブのキー（Function URLsのイベントにはrequestContextが含まれるため区別できる）
+BLOCK_ACTION_JOB_KEY = "block_action_job"
+
+# Lambdaクライアント（コンテナ内で再利用）
+_lambda_client: Any = None
+
+
+def dispatch_block_action(job: dict[str, Any]) -> None:
+    """
+    アクションボタンのジョブを自分自身への非同期呼び出しで処理する
+
+    Slackは3秒以内の応答を求めるため、モデル呼び出しは応答後の別の呼び出しで行う。
+    Lambda環境外（関数名が取得できない場合）はその場で処理する。
+
+    Args:
+        job: prepare_block_actionで組み立てたジョブ
+    """
+    global _lambda_client
+    function_name = os.environ.get("AWS_LAMBDA_FUNCTION_NAME")
+    if not function_name:
+        logger.warning("AWS_LAMBDA_FUNCTION_NAME is not set, processing block action synchronously")
+        process_block_action(job)
+        return
+
+    if _lambda_client is None:
+        import boto3
+
+        _lambda_client = boto3.client("lambda", region_name=settings.aws_region)
+
+    _lambda_client.invoke(
+        FunctionName=function_name,
+        InvocationType="Event",
+        Payload=json.dumps({BLOCK_ACTION_JOB_KEY: job}).encode("utf-8"),
+    )
+    logger.info(f"Dispatched block action job asynchronously: {job['action_id']}")
+
 
 def lambda_handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
     """
     Lambda関数のエントリーポイント（Function URLs対応）
     """
+    # リクエストIDをログ出力
+    request_id = getattr(context, 'aws_request_id', 'unknown') if context else "unknown"
+    logger.info(f"=== Lambda invoked with request_id: {request_id} ===")
+
+    # プロファイリング（環境変数または署名付きデバッグフラグで有効化）
+    profiling_enabled = settings.profiling_enabled
+    debug_flag = (event.get("headers") or {}).get("x-debug-profile")
+    if debug_flag and not profiling_enabled:
+        profiling_enabled = verify_debug_flag(settings.profiling_secret, debug_flag)
+        if not profiling_enabled:
+            logger.warning("Invalid debug profile flag")
+
+    with profile_invocation(profiling_enabled, request_id, settings.profiling_dump_dir, settings.profiling_top_n):
+        # 自己非同期呼び出し（アクションボタンのジョブ）
+        if BLOCK_ACTION_JOB_KEY in event and "requestContext" not in event:
+            process_block_action(event[BLOCK_ACTION_JOB_KEY])
+            return create_response(200, "OK")
+
+        return handle_request(event)
+
+
+def handle_request(event: dict[str, Any]) -> dict[str, Any]:
+    """
+    Function URLsのリクエストを処理
+    """
     try:
-        # リクエストIDをログ出力
-        request_id = getattr(context, 'aws_request_id', 'unknown') if context else "unknown"
-        logger.info(f"=== Lambda invoked with request_id: {request_id} ===")
         # HTTPメソッドチェック
         if event.get("requestContext", {}).get("http", {}).get("method") != "POST":
             return create_response(405, "Method Not Allowed")
@@ -99,6 +158,14 @@ def lambda_handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
                 handle_app_mention(event_data)
                 logger.info("app_mention processing completed")
 
+        # Interactive Components（アクションボタン）処理: キャッシュ参照のみ行って即座に応答し、生成は非同期で実行
+        if slack_request.get("type") == "block_actions":
+            logger.info(f"Processing block_actions from user {slack_request.get('user', {}).get('id')}")
+            job = prepare_block_action(slack_request)
+            if job:
+                dispatch_block_action(job)
+            logger.info("block_actions acknowledged")
+
         return create_response(200, "OK")
 
     except Exception as e:
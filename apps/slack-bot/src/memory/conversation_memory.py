@@ -0,0 +1,122 @@
+import logging
+
+from memory.embedder import Embedder, HashingEmbedder
+from memory.vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationMemory:
+    """過去の質問と回答を埋め込みベクトルで保持し、類似するやり取りを検索する
+
+    プライベートチャンネルやDMの内容が他の場所に漏れないよう、検索対象は記録時と同じチャンネルに限定する。
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        max_entries: int = 1000,
+        top_k: int = 3,
+        min_score: float = 0.5,
+        max_answer_chars: int = 500,
+    ) -> None:
+        """
+        Args:
+            embedder: テキストをベクトル化するEmbedder
+            max_entries: 保持する最大件数（超過時は古いものから削除）
+            top_k: 検索時に返す最大件数
+            min_score: 関連ありと判定するコサイン類似度の下限
+            max_answer_chars: コンテキストに含める回答の最大文字数
+        """
+        self.embedder = embedder
+        self.index: VectorIndex[dict[str, str]] = VectorIndex(embedder.dimension, max_entries=max_entries)
+        self.top_k = top_k
+        self.min_score = min_score
+        self.max_answer_chars = max_answer_chars
+
+    def remember(self, channel: str, question: str, answer: str) -> None:
+        """
+        完了した質問と回答のペアを記録
+
+        Args:
+            channel: やり取りが行われたSlackチャンネルID
+            question: ユーザーの質問
+            answer: AIの回答
+        """
+        if not question.strip() or not answer.strip():
+            return
+
+        vectors = self.embedder.embed([question])
+        self.index.add(vectors, [{"channel": channel, "question": question, "answer": answer}])
+        logger.debug(f"Remembered Q/A turn (index size: {len(self.index)})")
+
+    def recall(self, channel: str, question: str) -> list[dict[str, str]]:
+        """
+        同じチャンネル内で質問に類似する過去のやり取りを検索
+
+        Args:
+            channel: SlackチャンネルID
+            question: ユーザーの質問
+
+        Returns:
+            list: 類似度の高い順の [{"channel": "...", "question": "...", "answer": "..."}]
+        """
+        if not question.strip() or len(self.index) == 0:
+            return []
+
+        matches = self.index.search(
+            self.embedder.embed([question]), top_k=self.top_k, where=lambda payload: payload["channel"] == channel
+        )[0]
+        return [payload for score, payload in matches if score >= self.min_score]
+
+    def build_context(self, channel: str, question: str) -> str:
+        """
+        類似する過去のやり取りをプロンプトに埋め込むためのテキストを作成
+
+        Args:
+            channel: SlackチャンネルID
+            question: ユーザーの質問
+
+        Returns:
+            str: コンテキストテキスト（該当なしの場合は空文字）
+        """
+        matches = self.recall(channel, question)
+        if not matches:
+            return ""
+
+        lines = ["参考: 過去の会話で関連するやり取り（必要な場合のみ参考にしてください）"]
+        for i, match in enumerate(matches, 1):
+            answer = match["answer"]
+            if len(answer) > self.max_answer_chars:
+                answer = answer[: self.max_answer_chars] + "..."
+            lines.append(f"{i}. Q: {match['question']}\n   A: {answer}")
+
+        logger.info(f"Injecting {len(matches)} related past conversations into context")
+        return "\n".join(lines)
+
+
+# グローバルインスタンス（Lambda環境での再利用のため）
+_conversation_memory: ConversationMemory | None = None
+
+
+def get_conversation_memory() -> ConversationMemory:
+    """設定に基づいてConversationMemoryのシングルトンインスタンスを取得"""
+    global _conversation_memory
+    if _conversation_memory is None:
+        from config.settings import settings
+
+        embedder: Embedder
+        if settings.memory_embedder == "bedrock":
+            from memory.embedder import BedrockEmbedder
+
+            embedder = BedrockEmbedder(settings.memory_embedding_model_id, settings.bedrock_region)
+        else:
+            embedder = HashingEmbedder()
+
+        _conversation_memory = ConversationMemory(
+            embedder,
+            max_entries=settings.memory_max_entries,
+            top_k=settings.memory_top_k,
+            min_score=settings.memory_min_score,
+        )
+    return _conversation_memory
@@ -0,0 +1,86 @@
+import hashlib
+import json
+import logging
+from typing import Any, Protocol
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class Embedder(Protocol):
+    """テキストをベクトルに変換するEmbedderのインターフェース"""
+
+    dimension: int
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """
+        テキストのリストを埋め込みベクトルに変換
+
+        Args:
+            texts: 変換対象のテキストリスト
+
+        Returns:
+            np.ndarray: shape=(len(texts), dimension) のfloat32配列
+        """
+        ...
+
+
+class HashingEmbedder:
+    """文字n-gramのフィーチャーハッシングによる決定的なローカルEmbedder
+
+    外部APIを呼び出さないため、テストやBedrock Embeddingが使えない環境での代替として使用する。
+    日本語は単語区切りがないため、文字bigram/trigramを特徴量とする。
+    """
+
+    def __init__(self, dimension: int = 256, ngram_sizes: tuple[int, ...] = (2, 3)) -> None:
+        self.dimension = dimension
+        self.ngram_sizes = ngram_sizes
+
+    def _bucket(self, token: str) -> tuple[int, float]:
+        """トークンをハッシュしてバケット番号と符号を返す（プロセス間で決定的）"""
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dimension, 1.0 if (value >> 63) & 1 else -1.0
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+
+        for row, text in enumerate(texts):
+            normalized = "".join(text.lower().split())
+            for n in self.ngram_sizes:
+                for i in range(max(len(normalized) - n + 1, 0)):
+                    index, sign = self._bucket(normalized[i : i + n])
+                    vectors[row, index] += sign
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors /= norms
+        return vectors
+
+
+class BedrockEmbedder:
+    """Bedrock (Titan Text Embeddings) を使用するEmbedder"""
+
+    def __init__(self, model_id: str, region_name: str, dimension: int = 256) -> None:
+        import boto3
+
+        self.model_id = model_id
+        self.dimension = dimension
+        self._client: Any = boto3.client("bedrock-runtime", region_name=region_name)
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+
+        # Titan Embeddingはバッチ入力に対応していないため1件ずつ呼び出す
+        for row, text in enumerate(texts):
+            response = self._client.invoke_model(
+                modelId=self.model_id,
+                contentType="application/json",
+                accept="application/json",
+                body=json.dumps({"inputText": text, "dimensions": self.dimension, "normalize": True}),
+            )
+            response_body = json.loads(response["body"].read())
+            vectors[row] = np.asarray(response_body["embedding"], dtype=np.float32)
+
+        return vectors
@@ -0,0 +1,114 @@
+import logging
+from collections.abc import Callable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class VectorIndex[T]:
+    """NumPyベースの追記専用ベクトルインデックス
+
+    ベクトルは事前確保したバッファに追記し、容量を超えた場合は古いものからまとめて削除する。
+    検索は正規化済みベクトルの内積（コサイン類似度）を行列積で一括計算する。
+    """
+
+    def __init__(self, dimension: int, max_entries: int = 1000, evict_ratio: float = 0.1) -> None:
+        """
+        Args:
+            dimension: ベクトルの次元数
+            max_entries: 保持する最大件数
+            evict_ratio: 容量超過時に追加で削除する割合（削除処理の頻度を下げるため）
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+
+        self.dimension = dimension
+        self.max_entries = max_entries
+        self.evict_ratio = evict_ratio
+
+        self._vectors = np.zeros((min(max_entries, 64), dimension), dtype=np.float32)
+        self._payloads: list[T] = []
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def add(self, vectors: np.ndarray, payloads: list[T]) -> None:
+        """
+        ベクトルとペイロードを追記
+
+        Args:
+            vectors: shape=(n, dimension) のベクトル配列
+            payloads: 各ベクトルに対応するペイロード
+        """
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        if vectors.shape != (len(payloads), self.dimension):
+            raise ValueError(f"Expected vectors of shape ({len(payloads)}, {self.dimension}), got {vectors.shape}")
+
+        # 1回の追加で容量を超える場合は末尾のみ保持
+        if len(payloads) > self.max_entries:
+            vectors = vectors[-self.max_entries :]
+            payloads = payloads[-self.max_entries :]
+
+        overflow = len(self) + len(payloads) - self.max_entries
+        if overflow > 0:
+            self._evict_oldest(overflow + int(self.max_entries * self.evict_ratio))
+
+        size = len(self)
+        required = size + len(payloads)
+        if required > len(self._vectors):
+            # バッファを倍々で拡張（max_entriesが上限）
+            capacity = min(max(required, len(self._vectors) * 2), self.max_entries)
+            buffer = np.zeros((capacity, self.dimension), dtype=np.float32)
+            buffer[:size] = self._vectors[:size]
+            self._vectors = buffer
+
+        self._vectors[size:required] = vectors
+        self._payloads.extend(payloads)
+
+    def _evict_oldest(self, count: int) -> None:
+        """古いエントリをまとめて削除"""
+        count = min(count, len(self))
+        size = len(self)
+        self._vectors[: size - count] = self._vectors[count:size]
+        del self._payloads[:count]
+        logger.info(f"Evicted {count} oldest entries from vector index")
+
+    def search(
+        self, queries: np.ndarray, top_k: int = 3, where: Callable[[T], bool] | None = None
+    ) -> list[list[tuple[float, T]]]:
+        """
+        クエリベクトル群に対して上位k件を一括検索
+
+        Args:
+            queries: shape=(m, dimension) の正規化済みクエリベクトル
+            top_k: クエリごとに返す件数
+            where: 検索対象とするペイロードの条件（指定時は条件を満たすエントリのみを返す）
+
+        Returns:
+            list: クエリごとの [(類似度, ペイロード), ...]（類似度の降順）
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        size = len(self)
+        if size == 0 or top_k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        scores = queries @ self._vectors[:size].T
+
+        # 条件を満たさないエントリは候補から除外
+        k = min(top_k, size)
+        if where is not None:
+            mask = np.fromiter((where(payload) for payload in self._payloads), dtype=bool, count=size)
+            k = min(k, int(mask.sum()))
+            if k == 0:
+                return [[] for _ in range(len(queries))]
+            scores[:, ~mask] = -np.inf
+
+        # 上位k件をargpartitionで抽出してからその中だけをソート
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, indices in enumerate(candidates):
+            ordered = indices[np.argsort(-scores[row, indices])]
+            results.append([(float(scores[row, i]), self._payloads[i]) for i in ordered])
+
+        return results
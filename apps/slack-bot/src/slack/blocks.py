@@ -0,0 +1,41 @@
+from typing import Any
+
+# Block Kitのsectionテキストの最大文字数
+SECTION_TEXT_LIMIT = 3000
+
+# 返信に付与するアクションボタン: action_id -> (ボタンラベル, 再生成時の指示)
+REPLY_ACTIONS: dict[str, tuple[str, str]] = {
+    "regenerate_reply": ("🔄 再生成", "同じ質問に対して、別の観点や表現で回答し直してください。"),
+    "shorten_reply": ("✂️ 短く", "前回の回答を要点だけに絞って、より短くまとめ直してください。"),
+    "expand_reply": ("📖 詳しく", "前回の回答をより詳しく、具体例を交えて説明し直してください。"),
+}
+
+
+def build_reply_blocks(text: str) -> list[dict[str, Any]]:
+    """
+    AIの返信テキストにアクションボタンを付与したBlock Kitのブロックを作成
+
+    Args:
+        text: 返信テキスト
+
+    Returns:
+        list: Block Kitのブロックリスト
+    """
+    blocks: list[dict[str, Any]] = []
+
+    # sectionの文字数制限に合わせて分割
+    for start in range(0, max(len(text), 1), SECTION_TEXT_LIMIT):
+        chunk = text[start : start + SECTION_TEXT_LIMIT] or " "
+        blocks.append({"type": "section", "text": {"type": "mrkdwn", "text": chunk}})
+
+    blocks.append(
+        {
+            "type": "actions",
+            "elements": [
+                {"type": "button", "action_id": action_id, "text": {"type": "plain_text", "text": label}}
+                for action_id, (label, _) in REPLY_ACTIONS.items()
+            ],
+        }
+    )
+
+    return blocks
@@ -3,12 +3,24 @@ from typing import Any
 
 from slack_sdk import WebClient
 
+from ai.bedrock_client import chat_with_bedrock_direct, generate_with_bedrock_direct
 from ai.strands_client import chat_with_strands
 from config.settings import settings
-from slack.message_parser import extract_clean_message, parse_thread_history_for_ai
+from slack.blocks import REPLY_ACTIONS, build_reply_blocks
+from slack.message_parser import collect_user_ids, extract_clean_message, parse_thread_history_for_ai
+from slack.user_directory import get_user_directory
+from usage.ledger import get_usage_ledger
+from utils.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+BUDGET_EXCEEDED_MESSAGE = "申し訳ありません。本日の利用上限に達したため、明日以降に再度お試しください。"
+
+# 返信ごとの会話コンテキスト（アクションボタンからの再生成で再利用するため）
+_reply_contexts: TTLCache[str, dict[str, Any]] = TTLCache(
+    settings.reply_cache_ttl, max_entries=settings.reply_cache_max_entries
+)
+
 
 def handle_app_mention(event: dict[str, Any]) -> None:
     """
@@ -31,42 +43,223 @@ def handle_app_mention(event: dict[str, Any]) -> None:
             logger.error("Missing required parameters: channel or thread_ts")
             return
 
-        # メンションを除去してユーザーメッセージを取得
-        clean_user_message = extract_clean_message(user_text)
+        # トークン予算をチェック（モデル呼び出し前）
+        user = event.get("user", "unknown")
+        ledger = get_usage_ledger()
+        budget_status = ledger.check_budget(user, channel)
+        if budget_status == "exceeded":
+            client.chat_postMessage(channel=channel, thread_ts=thread_ts, text=BUDGET_EXCEEDED_MESSAGE)
+            logger.info(f"Refused app mention due to token budget: user={user}, channel={channel}")
+            return
+
+        conversation_history = None
+        thread_messages: list[dict[str, Any]] = []
 
         # スレッド内でのメンションかチェック
         if event.get("thread_ts"):
-            # スレッド履歴を取得してAIと会話
+            # スレッド履歴を取得
             try:
                 thread_response = client.conversations_replies(channel=channel, ts=event["thread_ts"], limit=50)
 
                 if thread_response["ok"]:
-                    messages = thread_response["messages"]
-                    logger.info(f"Retrieved {len(messages)} messages from thread")
-                    
                     # 現在のメッセージを除外（重複を避けるため）
-                    conversation_history = parse_thread_history_for_ai(
-                        [msg for msg in messages if msg.get("ts") != message_ts]
-                    )
-                    logger.info(f"Parsed {len(conversation_history)} messages for AI context")
-
-                    # AIと会話（履歴付き）
-                    response_text = chat_with_strands(clean_user_message, conversation_history)
-                else:
-                    # 履歴取得失敗時は履歴なしで会話
-                    response_text = chat_with_strands(clean_user_message)
+                    thread_messages = [msg for msg in thread_response["messages"] if msg.get("ts") != message_ts]
+                    logger.info(f"Retrieved {len(thread_messages)} messages from thread")
             except Exception as e:
+                # 履歴取得失敗時は履歴なしで会話
                 logger.error(f"Error getting thread history: {e}")
-                response_text = chat_with_strands(clean_user_message)
+
+        # 表示に使う発言者とメンションの表示名だけをまとめて解決
+        user_directory = get_user_directory()
+        bot_user_id = user_directory.bot_user_id(client)
+        # Bot自身のIDが分からない場合はどのメンションがBotか判別できないため、メンションは全て除去する
+        render_mentions = bot_user_id is not None
+        if thread_messages:
+            user_ids = collect_user_ids([*thread_messages, event], include_mentions=render_mentions)
+        elif render_mentions:
+            # スレッド外では発言者名を付与しないため、メンション先のみを解決
+            user_ids = collect_user_ids([event], include_speakers=False)
+        else:
+            user_ids = []
+        user_names = user_directory.resolve(client, [user_id for user_id in user_ids if user_id != bot_user_id])
+
+        if thread_messages:
+            conversation_history = parse_thread_history_for_ai(thread_messages, user_names, render_mentions)
+            logger.info(f"Parsed {len(conversation_history)} messages for AI context")
+
+        # メンションを表示名に置換してユーザーメッセージを取得（複数人の会話では発言者名を付与）
+        clean_user_message = extract_clean_message(user_text, user_names if render_mentions else None)
+        if conversation_history and user in user_names:
+            clean_user_message = f"{user_names[user]}: {clean_user_message}"
+
+        def record_usage(input_tokens: int, output_tokens: int) -> None:
+            ledger.record(user, channel, input_tokens, output_tokens)
+
+        if budget_status == "degraded":
+            # 予算の上限が近い場合はツールなし・出力トークン制限付きの直接呼び出しに切り替え
+            logger.info(f"Using degraded fast path due to token budget: user={user}, channel={channel}")
+            response_text = chat_with_bedrock_direct(
+                clean_user_message,
+                conversation_history,
+                max_tokens=settings.usage_degraded_max_tokens,
+                on_usage=record_usage,
+            )
         else:
-            # 通常のメンション - AIと会話（履歴なし）
-            response_text = chat_with_strands(clean_user_message)
+            # AIと会話（スレッド内の場合は履歴付き）
+            # 会話メモリには発言者名・メンション先の表示名を含めない質問を使う
+            response_text = chat_with_strands(
+                clean_user_message,
+                conversation_history,
+                on_usage=record_usage,
+                channel=channel,
+                memory_query=extract_clean_message(user_text),
+            )
+
+        # Slackに返信（再生成・短縮・詳細化のアクションボタン付き）
+        post_response = client.chat_postMessage(
+            channel=channel, thread_ts=thread_ts, text=response_text, blocks=build_reply_blocks(response_text)
+        )
 
-        # Slackに返信
-        client.chat_postMessage(channel=channel, thread_ts=thread_ts, text=response_text)
+        # アクションボタンから再利用できるよう組み立て済みのコンテキストを保持
+        if post_response.get("ok") and post_response.get("ts"):
+            _reply_contexts.set(
+                f"{channel}:{post_response['ts']}",
+                {
+                    "user_message": clean_user_message,
+                    "conversation_history": conversation_history or [],
+                    "response_text": response_text,
+                },
+            )
 
         logger.info(f"Responded to app mention in channel: {channel}")
 
     except Exception as e:
         logger.error(f"Error handling app mention: {e}")
         raise
+
+    finally:
+        # コンテナが凍結・破棄される前にバッファ内の使用量を書き戻す
+        get_usage_ledger().flush()
+
+
+def prepare_block_action(payload: dict[str, Any]) -> dict[str, Any] | None:
+    """
+    返信に付与したアクションボタン（再生成・短縮・詳細化）の処理内容を組み立てる
+
+    Slackへの応答期限（3秒）内に実行するため、モデルは呼び出さずキャッシュの参照と予算チェックのみを行う。
+    組み立てたジョブには会話コンテキストを含めるため、別のコンテナで処理してもSlackからの再取得は不要。
+
+    Args:
+        payload: Slack Interactive Componentsのペイロード
+
+    Returns:
+        dict | None: process_block_actionに渡すジョブ（処理不要の場合はNone）
+    """
+    actions = payload.get("actions") or []
+    action_id = actions[0].get("action_id") if actions else None
+    channel = payload.get("channel", {}).get("id")
+    message_ts = payload.get("container", {}).get("message_ts") or payload.get("message", {}).get("ts")
+    user = payload.get("user", {}).get("id", "unknown")
+
+    if action_id not in REPLY_ACTIONS or not channel or not message_ts:
+        logger.info(f"Ignoring unsupported block action: {action_id}")
+        return None
+
+    client = WebClient(token=settings.slack_bot_token)
+
+    # 元の返信のコンテキストを取得（Slackからの再取得は行わない）
+    cache_key = f"{channel}:{message_ts}"
+    reply_context = _reply_contexts.get(cache_key)
+    if reply_context is None:
+        logger.info(f"Reply context not found for {cache_key}")
+        client.chat_postEphemeral(
+            channel=channel,
+            user=user,
+            text="元の会話の情報が見つかりませんでした。お手数ですが、もう一度メンションしてください。",
+        )
+        return None
+
+    budget_status = get_usage_ledger().check_budget(user, channel)
+    if budget_status == "exceeded":
+        client.chat_postEphemeral(channel=channel, user=user, text=BUDGET_EXCEEDED_MESSAGE)
+        return None
+
+    return {
+        "action_id": action_id,
+        "channel": channel,
+        "message_ts": message_ts,
+        "user": user,
+        "budget_status": budget_status,
+        "user_message": reply_context["user_message"],
+        "conversation_history": reply_context["conversation_history"],
+        # 現在表示中の回答（以前のアクションで更新済みの場合も含む）
+        "response_text": payload.get("message", {}).get("text") or reply_context["response_text"],
+    }
+
+
+def process_block_action(job: dict[str, Any]) -> None:
+    """
+    組み立て済みのジョブでモデルを1回だけ呼び出し、元のメッセージを更新する
+
+    生成に失敗した場合は元のメッセージを残したまま、実行したユーザーにのみ通知する。
+
+    Args:
+        job: prepare_block_actionで組み立てたジョブ
+    """
+    try:
+        client = WebClient(token=settings.slack_bot_token)
+
+        action_id = job["action_id"]
+        channel = job["channel"]
+        message_ts = job["message_ts"]
+        user = job["user"]
+        cache_key = f"{channel}:{message_ts}"
+
+        ledger = get_usage_ledger()
+
+        def record_usage(input_tokens: int, output_tokens: int) -> None:
+            ledger.record(user, channel, input_tokens, output_tokens)
+
+        # 元の質問と前回の回答を履歴に含め、変更指示だけを新たなメッセージとして送る
+        _, instruction = REPLY_ACTIONS[action_id]
+        conversation_history = [
+            *job["conversation_history"],
+            {"role": "user", "content": job["user_message"]},
+            {"role": "assistant", "content": job["response_text"]},
+        ]
+        # 予算の上限が近い場合は詳細化でも出力トークンを制限する
+        max_tokens = settings.usage_degraded_max_tokens if job.get("budget_status") == "degraded" else None
+        logger.info(f"Processing block action {action_id} for {cache_key}")
+        try:
+            response_text = generate_with_bedrock_direct(
+                instruction, conversation_history, max_tokens=max_tokens, on_usage=record_usage
+            )
+        except Exception as e:
+            logger.error(f"Error generating response for block action: {e}")
+            client.chat_postEphemeral(
+                channel=channel,
+                user=user,
+                text="申し訳ありません。回答の再生成に失敗しました。時間をおいて再度お試しください。",
+            )
+            return
+
+        # 元のメッセージを更新
+        client.chat_update(channel=channel, ts=message_ts, text=response_text, blocks=build_reply_blocks(response_text))
+        _reply_contexts.set(
+            cache_key,
+            {
+                "user_message": job["user_message"],
+                "conversation_history": job["conversation_history"],
+                "response_text": response_text,
+            },
+        )
+
+        logger.info(f"Updated reply {cache_key} with action {action_id}")
+
+    except Exception as e:
+        logger.error(f"Error handling block action: {e}")
+        raise
+
+    finally:
+        # コンテナが凍結・破棄される前にバッファ内の使用量を書き戻す
+        get_usage_ledger().flush()
@@ -1,28 +1,66 @@
 import re
 from typing import Any
 
+MENTION_PATTERN = re.compile(r"<@([UW][A-Z0-9]+)(?:\|[^>]*)?>")
 
-def extract_clean_message(text: str) -> str:
+
+def extract_clean_message(text: str, user_names: dict[str, str] | None = None) -> str:
     """
     Slackメッセージからメンションなどを除去してクリーンなテキストを取得
 
     Args:
         text: Slackのメッセージテキスト
+        user_names: ユーザーID -> 表示名（指定時は解決できたメンションを "@表示名" に置換）
 
     Returns:
         str: クリーンなテキスト
     """
-    # メンションを除去
-    clean_text = re.sub(r"<@[UW][A-Z0-9]+>", "", text).strip()
-    return clean_text
+    names = user_names or {}
+
+    # メンションを表示名に置換（解決できないメンションは除去）
+    clean_text = MENTION_PATTERN.sub(lambda m: f"@{names[m.group(1)]}" if m.group(1) in names else "", text)
+    return clean_text.strip()
+
+
+def is_bot_message(msg: dict[str, Any]) -> bool:
+    """Botのメッセージかどうかを判定"""
+    return bool(msg.get("bot_id") or msg.get("app_id") or msg.get("subtype") == "bot_message")
+
+
+def collect_user_ids(
+    messages: list[dict[str, Any]], include_speakers: bool = True, include_mentions: bool = True
+) -> list[str]:
+    """
+    メッセージの発言者とメンションからユーザーIDを重複なく収集
+
+    Args:
+        messages: Slackのメッセージリスト
+        include_speakers: 発言者（Bot以外）のユーザーIDを含めるかどうか
+        include_mentions: メンション先のユーザーIDを含めるかどうか
+
+    Returns:
+        list: ユーザーID（出現順）
+    """
+    user_ids: dict[str, None] = {}
+    for msg in messages:
+        if include_speakers and msg.get("user") and not is_bot_message(msg):
+            user_ids[msg["user"]] = None
+        if include_mentions:
+            for user_id in MENTION_PATTERN.findall(msg.get("text", "")):
+                user_ids[user_id] = None
+    return list(user_ids)
 
 
-def parse_thread_history_for_ai(messages: list[dict[str, Any]]) -> list[dict[str, str]]:
+def parse_thread_history_for_ai(
+    messages: list[dict[str, Any]], user_names: dict[str, str] | None = None, render_mentions: bool = True
+) -> list[dict[str, str]]:
     """
     Slackのメッセージ履歴をAI用の会話履歴形式に変換
 
     Args:
         messages: Slackのメッセージリスト
+        user_names: ユーザーID -> 表示名（指定時はユーザーの発言に "表示名: " を付与し、メンションを表示名に置換）
+        render_mentions: Falseの場合はメンションを表示名に置換せず全て除去する
 
     Returns:
         list: AI用会話履歴 [{"role": "user"|"assistant", "content": "..."}]
@@ -38,18 +76,19 @@ def parse_thread_history_for_ai(messages: list[dict[str, Any]]) -> list[dict[str
             continue
 
         # メンションを除去してクリーンなテキストにする
-        clean_text = extract_clean_message(text)
+        clean_text = extract_clean_message(text, user_names if render_mentions else None)
 
         if clean_text:
             # ボットかユーザーかを判定
-            is_bot = bool(msg.get("bot_id") or msg.get("app_id") or msg.get("subtype") == "bot_message")
-            
-            if is_bot:
+            if is_bot_message(msg):
                 # Botのメッセージ
                 conversation_history.append({"role": "assistant", "content": clean_text})
                 logger.debug(f"Added bot message: {clean_text[:50]}...")
             else:
-                # ユーザーのメッセージ
+                # ユーザーのメッセージ（発言者が分かる場合は名前を付与）
+                speaker = (user_names or {}).get(msg.get("user", ""))
+                if speaker:
+                    clean_text = f"{speaker}: {clean_text}"
                 conversation_history.append({"role": "user", "content": clean_text})
                 logger.debug(f"Added user message: {clean_text[:50]}...")
 
@@ -0,0 +1,123 @@
+import logging
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+def get_display_name(user: dict[str, Any]) -> str:
+    """
+    users.infoのユーザー情報から表示名を取得
+
+    Args:
+        user: users.infoのuserオブジェクト
+
+    Returns:
+        str: 表示名（display_name → real_name → name の順で使用）
+    """
+    profile = user.get("profile", {})
+    name = profile.get("display_name") or profile.get("real_name") or user.get("real_name") or user.get("name")
+    return str(name or user["id"])
+
+
+class UserDirectory:
+    """SlackユーザーIDから表示名を解決する（ウォームコンテナ内でキャッシュ）"""
+
+    def __init__(
+        self, ttl: float = 3600, max_entries: int = 1000, max_workers: int = 8, failure_ttl: float = 300
+    ) -> None:
+        """
+        Args:
+            ttl: 表示名キャッシュの有効期限（秒）
+            max_entries: キャッシュする最大件数
+            max_workers: users.infoを並列に呼び出す最大数
+            failure_ttl: 取得に失敗したユーザーを再取得しない期間（秒）
+        """
+        self.max_workers = max_workers
+        self._names: TTLCache[str, str] = TTLCache(ttl, max_entries=max_entries)
+        # 削除済み・参照権限のないユーザーへの呼び出しをメンションのたびに繰り返さないため失敗も記録する
+        self._failures: TTLCache[str, bool] = TTLCache(failure_ttl, max_entries=max_entries)
+        self._bot_user_id: str | None = None
+
+    def bot_user_id(self, client: Any) -> str | None:
+        """
+        Bot自身のユーザーIDを取得（初回のみauth.testを呼び出す）
+
+        Args:
+            client: Slack WebClient
+
+        Returns:
+            str | None: BotのユーザーID（取得失敗時はNone）
+        """
+        if self._bot_user_id is None:
+            try:
+                self._bot_user_id = client.auth_test()["user_id"]
+            except Exception as e:
+                logger.error(f"Failed to get bot user id: {e}")
+        return self._bot_user_id
+
+    def resolve(self, client: Any, user_ids: Iterable[str]) -> dict[str, str]:
+        """
+        ユーザーIDをまとめて表示名に解決
+
+        キャッシュにないIDのみ重複を除いてusers.infoを並列に呼び出す。取得に失敗したIDは結果に含めず、
+        一定期間は再取得しない。
+
+        Args:
+            client: Slack WebClient
+            user_ids: 解決対象のユーザーID
+
+        Returns:
+            dict: ユーザーID -> 表示名
+        """
+        names: dict[str, str] = {}
+        missing: list[str] = []
+        for user_id in dict.fromkeys(user_ids):
+            name = self._names.get(user_id)
+            if name is not None:
+                names[user_id] = name
+            elif self._failures.get(user_id) is None:
+                missing.append(user_id)
+
+        if not missing:
+            return names
+
+        def fetch(user_id: str) -> tuple[str, str | None]:
+            try:
+                response = client.users_info(user=user_id)
+                return user_id, get_display_name(response["user"])
+            except Exception as e:
+                logger.warning(f"Failed to resolve user {user_id}: {e}")
+                return user_id, None
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as executor:
+            for user_id, name in executor.map(fetch, missing):
+                if name is None:
+                    self._failures.set(user_id, True)
+                else:
+                    self._names.set(user_id, name)
+                    names[user_id] = name
+
+        logger.info(f"Resolved {len(missing)} user names via users.info ({len(names)} total)")
+        return names
+
+
+# グローバルインスタンス（Lambda環境での再利用のため）
+_user_directory: UserDirectory | None = None
+
+
+def get_user_directory() -> UserDirectory:
+    """設定に基づいてUserDirectoryのシングルトンインスタンスを取得"""
+    global _user_directory
+    if _user_directory is None:
+        from config.settings import settings
+
+        _user_directory = UserDirectory(
+            ttl=settings.user_cache_ttl,
+            max_workers=settings.user_lookup_max_workers,
+            failure_ttl=settings.user_lookup_failure_ttl,
+        )
+    return _user_directory
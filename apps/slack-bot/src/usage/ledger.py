@@ -0,0 +1,169 @@
+import logging
+import threading
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from typing import Literal
+
+from usage.store import UsageKey, UsageStore
+
+logger = logging.getLogger(__name__)
+
+# 予算チェック結果: ok=通常処理, degraded=軽量な応答に切り替え, exceeded=応答を拒否
+BudgetStatus = Literal["ok", "degraded", "exceeded"]
+
+
+class UsageLedger:
+    """ユーザー・チャンネル・日単位のトークン使用量を記録し、予算を判定する
+
+    記録はメモリ上のバッファに加算し、件数または経過時間の閾値を超えた時点でまとめてストアへ書き戻す。
+    ヘッジしたモデル呼び出しの完了がワーカースレッドから通知されるため、更新はロックで保護する。
+    """
+
+    def __init__(
+        self,
+        store: UsageStore,
+        user_daily_budget: int = 0,
+        channel_daily_budget: int = 0,
+        degrade_ratio: float = 0.8,
+        flush_threshold: int = 20,
+        flush_interval: float = 30.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        Args:
+            store: 永続化ストア
+            user_daily_budget: ユーザーごとの1日あたりのトークン上限（0以下で無制限）
+            channel_daily_budget: チャンネルごとの1日あたりのトークン上限（0以下で無制限）
+            degrade_ratio: 上限に対してこの割合を超えたら軽量な応答に切り替える
+            flush_threshold: バッファ内のキー数がこの値に達したら書き戻す
+            flush_interval: 前回の書き戻しからこの秒数が経過したら書き戻す
+            clock: 現在時刻（UNIX秒）を返す関数
+        """
+        self.store = store
+        self.user_daily_budget = user_daily_budget
+        self.channel_daily_budget = channel_daily_budget
+        self.degrade_ratio = degrade_ratio
+        self.flush_threshold = flush_threshold
+        self.flush_interval = flush_interval
+        self._clock = clock
+
+        self._totals: dict[UsageKey, tuple[int, int]] = {}
+        self._pending: dict[UsageKey, tuple[int, int]] = {}
+        self._last_flush = clock()
+        self._lock = threading.RLock()
+
+    def _today(self) -> str:
+        return datetime.fromtimestamp(self._clock(), UTC).date().isoformat()
+
+    def _keys(self, user: str, channel: str) -> list[UsageKey]:
+        day = self._today()
+        return [("user", user, day), ("channel", channel, day)]
+
+    def _total(self, key: UsageKey) -> tuple[int, int]:
+        """キャッシュ済みの累計を返す（未取得の場合はストアから読み込む）"""
+        if key not in self._totals:
+            self._totals[key] = self.store.get(key)
+        return self._totals[key]
+
+    def record(self, user: str, channel: str, input_tokens: int, output_tokens: int) -> None:
+        """
+        1回のモデル呼び出しの使用量を記録
+
+        Args:
+            user: SlackユーザーID
+            channel: SlackチャンネルID
+            input_tokens: 入力トークン数
+            output_tokens: 出力トークン数
+        """
+        with self._lock:
+            for key in self._keys(user, channel):
+                total_in, total_out = self._total(key)
+                self._totals[key] = (total_in + input_tokens, total_out + output_tokens)
+                pending_in, pending_out = self._pending.get(key, (0, 0))
+                self._pending[key] = (pending_in + input_tokens, pending_out + output_tokens)
+
+            logger.info(f"Recorded token usage: user={user}, channel={channel}, in={input_tokens}, out={output_tokens}")
+
+            if len(self._pending) >= self.flush_threshold or self._clock() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def flush(self) -> None:
+        """バッファ内の差分をストアへ書き戻す"""
+        with self._lock:
+            if self._pending:
+                try:
+                    self.store.add(self._pending)
+                    self._pending = {}
+                except Exception as e:
+                    # 書き戻しに失敗しても差分はバッファに残して次回再試行する
+                    logger.error(f"Failed to flush token usage: {e}")
+                    return
+            self._last_flush = self._clock()
+
+            # 日付が変わった古いキャッシュを破棄
+            today = self._today()
+            self._totals = {key: value for key, value in self._totals.items() if key[2] == today}
+
+    def usage(self, scope: str, scope_id: str) -> int:
+        """
+        当日の合計トークン数（入力+出力）を取得
+
+        Args:
+            scope: "user" または "channel"
+            scope_id: ユーザーIDまたはチャンネルID
+
+        Returns:
+            int: 合計トークン数
+        """
+        with self._lock:
+            input_tokens, output_tokens = self._total((scope, scope_id, self._today()))
+        return input_tokens + output_tokens
+
+    def check_budget(self, user: str, channel: str) -> BudgetStatus:
+        """
+        ユーザーとチャンネルの予算状況を判定
+
+        Args:
+            user: SlackユーザーID
+            channel: SlackチャンネルID
+
+        Returns:
+            BudgetStatus: 最も厳しい判定結果
+        """
+        status: BudgetStatus = "ok"
+        for scope, scope_id, budget in (
+            ("user", user, self.user_daily_budget),
+            ("channel", channel, self.channel_daily_budget),
+        ):
+            if budget <= 0:
+                continue
+
+            used = self.usage(scope, scope_id)
+            if used >= budget:
+                logger.warning(f"Token budget exceeded: {scope}={scope_id}, used={used}, budget={budget}")
+                return "exceeded"
+            if used >= budget * self.degrade_ratio:
+                status = "degraded"
+
+        return status
+
+
+# グローバルインスタンス（Lambda環境での再利用のため）
+_usage_ledger: UsageLedger | None = None
+
+
+def get_usage_ledger() -> UsageLedger:
+    """設定に基づいてUsageLedgerのシングルトンインスタンスを取得"""
+    global _usage_ledger
+    if _usage_ledger is None:
+        from config.settings import settings
+        from usage.store import SQLiteUsageStore
+
+        _usage_ledger = UsageLedger(
+            SQLiteUsageStore(settings.usage_db_path),
+            user_daily_budget=settings.usage_user_daily_budget,
+            channel_daily_budget=settings.usage_channel_daily_budget,
+            degrade_ratio=settings.usage_degrade_ratio,
+        )
+    return _usage_ledger
@@ -0,0 +1,78 @@
+import logging
+import sqlite3
+from typing import Protocol
+
+logger = logging.getLogger(__name__)
+
+# (スコープ種別, スコープID, 日付) 例: ("user", "U123", "2025-01-01")
+UsageKey = tuple[str, str, str]
+
+
+class UsageStore(Protocol):
+    """トークン使用量を永続化するストアのインターフェース"""
+
+    def get(self, key: UsageKey) -> tuple[int, int]:
+        """
+        指定キーの累計使用量を取得
+
+        Args:
+            key: (スコープ種別, スコープID, 日付)
+
+        Returns:
+            tuple: (入力トークン数, 出力トークン数)
+        """
+        ...
+
+    def add(self, deltas: dict[UsageKey, tuple[int, int]]) -> None:
+        """
+        使用量の差分をまとめて加算
+
+        Args:
+            deltas: キーごとの (入力トークン数, 出力トークン数) の差分
+        """
+        ...
+
+
+class SQLiteUsageStore:
+    """SQLiteによるUsageStore実装（Lambdaでは/tmpに配置するコンテナ単位のストア）"""
+
+    def __init__(self, path: str = ":memory:") -> None:
+        # ワーカースレッドからの書き戻しを許可（排他制御はUsageLedgerのロックで行う）
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS token_usage (
+                scope TEXT NOT NULL,
+                scope_id TEXT NOT NULL,
+                day TEXT NOT NULL,
+                input_tokens INTEGER NOT NULL DEFAULT 0,
+                output_tokens INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (scope, scope_id, day)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, key: UsageKey) -> tuple[int, int]:
+        row = self._conn.execute(
+            "SELECT input_tokens, output_tokens FROM token_usage WHERE scope = ? AND scope_id = ? AND day = ?",
+            key,
+        ).fetchone()
+        return (int(row[0]), int(row[1])) if row else (0, 0)
+
+    def add(self, deltas: dict[UsageKey, tuple[int, int]]) -> None:
+        if not deltas:
+            return
+
+        with self._conn:
+            self._conn.executemany(
+                """
+                INSERT INTO token_usage (scope, scope_id, day, input_tokens, output_tokens)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (scope, scope_id, day) DO UPDATE SET
+                    input_tokens = input_tokens + excluded.input_tokens,
+                    output_tokens = output_tokens + excluded.output_tokens
+                """,
+                [(*key, input_tokens, output_tokens) for key, (input_tokens, output_tokens) in deltas.items()],
+            )
+        logger.debug(f"Flushed {len(deltas)} usage entries to SQLite")
@@ -0,0 +1,135 @@
+import cProfile
+import hashlib
+import hmac
+import json
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+def verify_debug_flag(secret: str | None, flag: str | None, max_age: int = 300) -> bool:
+    """
+    プロファイリング用デバッグフラグの署名を検証
+
+    フラグの形式は "<UNIXタイムスタンプ>:<HMAC-SHA256(secret, "profile:<タイムスタンプ>")の16進数>"
+
+    Args:
+        secret: 署名用シークレット（未設定の場合は常にFalse）
+        flag: リクエストに付与されたフラグ
+        max_age: 許容するタイムスタンプの経過秒数
+
+    Returns:
+        bool: 署名が有効な場合True
+    """
+    if not secret or not flag or ":" not in flag:
+        return False
+
+    timestamp, signature = flag.split(":", 1)
+    try:
+        if abs(int(time.time()) - int(timestamp)) > max_age:
+            logger.warning("Debug flag timestamp is too old")
+            return False
+    except ValueError:
+        return False
+
+    expected = hmac.new(secret.encode(), f"profile:{timestamp}".encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def summarize_profile(
+    profiler: cProfile.Profile, snapshot: tracemalloc.Snapshot, peak: int, top_n: int
+) -> dict[str, Any]:
+    """
+    プロファイル結果を構造化ログ用のサマリーに変換
+
+    Args:
+        profiler: 計測済みのcProfile
+        snapshot: tracemallocのスナップショット
+        peak: ピークメモリ使用量（バイト）
+        top_n: 出力する関数・割り当て箇所の件数
+
+    Returns:
+        dict: サマリー
+    """
+    stats_profile = pstats.Stats(profiler).get_stats_profile()
+    functions = sorted(stats_profile.func_profiles.items(), key=lambda item: item[1].cumtime, reverse=True)
+
+    top_functions = [
+        {
+            "function": f"{os.path.basename(profile.file_name)}:{profile.line_number}({name})",
+            "ncalls": profile.ncalls,
+            "tottime": round(profile.tottime, 6),
+            "cumtime": round(profile.cumtime, 6),
+        }
+        for name, profile in functions[:top_n]
+    ]
+
+    top_allocations = [
+        {
+            "location": f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+            "size_kib": round(stat.size / 1024, 1),
+            "count": stat.count,
+        }
+        for stat in snapshot.statistics("lineno")[:top_n]
+    ]
+
+    return {
+        "total_time": round(stats_profile.total_tt, 6),
+        "peak_memory_kib": round(peak / 1024, 1),
+        "top_cumulative": top_functions,
+        "top_allocations": top_allocations,
+    }
+
+
+@contextmanager
+def profile_invocation(enabled: bool, label: str, dump_dir: str | None = None, top_n: int = 15) -> Iterator[None]:
+    """
+    ブロック内の処理をcProfileとtracemallocで計測し、サマリーをログ出力する
+
+    無効時は何もせずにブロックを実行する。
+
+    Args:
+        enabled: 計測を行うかどうか
+        label: ログ・ファイル名に使用する識別子（リクエストIDなど）
+        dump_dir: pstatsファイルの出力先（Noneまたは空の場合は出力しない）
+        top_n: サマリーに含める件数
+    """
+    if not enabled:
+        yield
+        return
+
+    # 既にtracemallocが有効な場合は停止しない
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+
+    # Python 3.12以降のcProfileはsys.monitoringを使用するため、Bedrock呼び出しやusers.infoを並列実行する
+    # ThreadPoolExecutorのワーカースレッドの処理も同じプロファイラで計測される
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if not was_tracing:
+            tracemalloc.stop()
+
+        try:
+            summary = summarize_profile(profiler, snapshot, peak, top_n)
+            if dump_dir:
+                path = os.path.join(dump_dir, f"profile-{label}.pstats")
+                profiler.dump_stats(path)
+                summary["pstats_file"] = path
+            logger.info(json.dumps({"profile": label, **summary}, ensure_ascii=False))
+        except Exception as e:
+            logger.error(f"Failed to summarize profile: {e}")
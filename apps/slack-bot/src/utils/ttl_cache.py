@@ -0,0 +1,60 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+
+class TTLCache[K, V]:
+    """有効期限と最大件数付きのインメモリキャッシュ（Lambdaのウォームコンテナ内で再利用）
+
+    最大件数を超えた場合は最も長く参照されていないエントリから削除する。
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 1000, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Args:
+            ttl: エントリの有効期限（秒）
+            max_entries: 保持する最大件数
+            clock: 現在時刻（秒）を返す関数
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> V | None:
+        """
+        有効なエントリを取得
+
+        Args:
+            key: キー
+
+        Returns:
+            値（未登録または期限切れの場合はNone）
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        """
+        エントリを登録
+
+        Args:
+            key: キー
+            value: 値
+        """
+        self._entries[key] = (self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
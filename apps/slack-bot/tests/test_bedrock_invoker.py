@@ -0,0 +1,132 @@
+import time
+
+import pytest
+
+from ai.bedrock_invoker import BedrockInvoker, BedrockTarget, LatencyTracker, parse_targets
+
+TOKYO = BedrockTarget("ap-northeast-1", "apac.model")
+VIRGINIA = BedrockTarget("us-east-1", "us.model")
+
+
+class TestParseTargets:
+    """呼び出し先設定のパーステスト"""
+
+    def test_parse_targets(self):
+        """model_id省略時はデフォルトを使用するテスト"""
+        targets = parse_targets("ap-northeast-1=apac.model, us-east-1,", "default.model")
+
+        assert targets == [TOKYO, BedrockTarget("us-east-1", "default.model")]
+
+
+class TestLatencyTracker:
+    """レイテンシ記録のテスト"""
+
+    def test_ewma_and_percentile(self):
+        """EWMAとパーセンタイルの計算テスト"""
+        tracker = LatencyTracker(alpha=0.5, min_samples=3)
+        tracker.record(TOKYO, 1.0)
+        tracker.record(TOKYO, 3.0)
+
+        assert tracker.ewma(TOKYO) == pytest.approx(2.0)
+        assert tracker.percentile(TOKYO, 95) is None
+
+        tracker.record(TOKYO, 2.0)
+        assert tracker.percentile(TOKYO, 95) == 3.0
+        assert tracker.ewma(VIRGINIA) is None
+
+    def test_record_failure_updates_ewma_only(self):
+        """失敗のペナルティはEWMAにのみ反映し、パーセンタイルには含めないテスト"""
+        tracker = LatencyTracker(alpha=0.5, min_samples=3)
+        for seconds in (1.0, 1.0, 1.0):
+            tracker.record(TOKYO, seconds)
+
+        tracker.record_failure(TOKYO, 30.0)
+
+        assert tracker.ewma(TOKYO) == pytest.approx(15.5)
+        assert tracker.percentile(TOKYO, 95) == 1.0
+
+
+class TestBedrockInvoker:
+    """ヘッジ付き呼び出しのテスト"""
+
+    def test_ranked_targets_prefers_fastest(self):
+        """EWMAが小さい呼び出し先を優先するテスト"""
+        invoker = BedrockInvoker([TOKYO, VIRGINIA])
+        assert invoker.ranked_targets() == [TOKYO, VIRGINIA]
+
+        invoker.tracker.record(TOKYO, 5.0)
+        invoker.tracker.record(VIRGINIA, 1.0)
+        assert invoker.ranked_targets() == [VIRGINIA, TOKYO]
+
+    def test_ranked_targets_puts_busy_targets_last(self):
+        """使用中の呼び出し先はEWMAに関わらず後回しにするテスト"""
+        invoker = BedrockInvoker([TOKYO, VIRGINIA])
+        invoker.tracker.record(TOKYO, 1.0)
+        invoker.tracker.record(VIRGINIA, 5.0)
+
+        assert invoker.ranked_targets(available=lambda target: target != TOKYO) == [VIRGINIA, TOKYO]
+
+    def test_restart_latency_timer_excludes_wait(self):
+        """計測の再開前の待ち時間をレイテンシに含めないテスト"""
+        invoker = BedrockInvoker([TOKYO])
+
+        def call(target):
+            time.sleep(0.2)
+            invoker.restart_latency_timer()
+            return target.region
+
+        invoker.invoke(call)
+
+        assert invoker.tracker.ewma(TOKYO) < 0.1
+
+    def test_hedges_slow_primary(self):
+        """プライマリが遅い場合にヘッジ先の結果を採用するテスト"""
+        invoker = BedrockInvoker([TOKYO, VIRGINIA], hedge_initial_delay=0.05)
+
+        def call(target):
+            if target == TOKYO:
+                time.sleep(0.5)
+            return target.region
+
+        started = time.monotonic()
+        assert invoker.invoke(call) == "us-east-1"
+        assert time.monotonic() - started < 0.4
+
+    def test_single_target_does_not_hedge(self):
+        """呼び出し先が1つの場合は遅くても同じ呼び出し先へヘッジしないテスト"""
+        invoker = BedrockInvoker([TOKYO], hedge_initial_delay=0.01)
+        calls = []
+
+        def call(target):
+            calls.append(target)
+            time.sleep(0.1)
+            return target.region
+
+        assert not invoker.hedge_enabled
+        assert invoker.invoke(call) == "ap-northeast-1"
+        assert calls == [TOKYO]
+
+    def test_fails_over_on_error(self):
+        """プライマリが失敗した場合に次点の呼び出し先を使うテスト"""
+        invoker = BedrockInvoker([TOKYO, VIRGINIA], hedge_enabled=False, error_penalty=30.0)
+
+        def call(target):
+            if target == TOKYO:
+                raise RuntimeError("ThrottlingException")
+            return target.region
+
+        assert invoker.invoke(call) == "us-east-1"
+        assert invoker.tracker.ewma(TOKYO) == pytest.approx(30.0)
+
+    def test_raises_when_all_targets_fail(self):
+        """全ての呼び出し先が失敗した場合は例外を送出するテスト"""
+        invoker = BedrockInvoker([TOKYO])
+        calls = []
+
+        def call(target):
+            calls.append(target)
+            raise RuntimeError("ServiceUnavailable")
+
+        with pytest.raises(RuntimeError, match="ServiceUnavailable"):
+            invoker.invoke(call)
+        assert calls == [TOKYO]
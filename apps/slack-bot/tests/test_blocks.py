@@ -0,0 +1,22 @@
+from slack.blocks import REPLY_ACTIONS, SECTION_TEXT_LIMIT, build_reply_blocks
+
+
+class TestBlocks:
+    """Block Kitブロック作成のテスト"""
+
+    def test_build_reply_blocks(self):
+        """返信テキストとアクションボタンのテスト"""
+        blocks = build_reply_blocks("こんにちは")
+
+        assert blocks[0] == {"type": "section", "text": {"type": "mrkdwn", "text": "こんにちは"}}
+        assert blocks[-1]["type"] == "actions"
+        assert [element["action_id"] for element in blocks[-1]["elements"]] == list(REPLY_ACTIONS)
+
+    def test_build_reply_blocks_splits_long_text(self):
+        """長いテキストが複数のsectionに分割されるテスト"""
+        text = "あ" * (SECTION_TEXT_LIMIT + 10)
+        blocks = build_reply_blocks(text)
+
+        sections = [block for block in blocks if block["type"] == "section"]
+        assert len(sections) == 2
+        assert "".join(section["text"]["text"] for section in sections) == text
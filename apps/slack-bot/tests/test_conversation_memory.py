@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from memory.conversation_memory import ConversationMemory
+from memory.embedder import HashingEmbedder
+from memory.vector_index import VectorIndex
+
+
+class TestHashingEmbedder:
+    """ハッシングEmbedderのテスト"""
+
+    def test_embed_is_deterministic_and_normalized(self):
+        """同じテキストは同じ正規化済みベクトルになるテスト"""
+        embedder = HashingEmbedder(dimension=64)
+
+        vectors = embedder.embed(["Lambdaのタイムアウト設定", "Lambdaのタイムアウト設定", ""])
+
+        assert vectors.shape == (3, 64)
+        assert np.allclose(vectors[0], vectors[1])
+        assert np.isclose(np.linalg.norm(vectors[0]), 1.0)
+        assert not vectors[2].any()
+
+
+class TestVectorIndex:
+    """ベクトルインデックスのテスト"""
+
+    def test_search_returns_top_k_in_order(self):
+        """類似度の降順で上位k件を返すテスト"""
+        index: VectorIndex[str] = VectorIndex(dimension=2)
+        index.add(np.array([[1.0, 0.0], [0.0, 1.0], [0.6, 0.8]]), ["x", "y", "xy"])
+
+        results = index.search(np.array([[1.0, 0.0], [0.0, 1.0]]), top_k=2)
+
+        assert [payload for _, payload in results[0]] == ["x", "xy"]
+        assert [payload for _, payload in results[1]] == ["y", "xy"]
+
+    def test_evicts_oldest_when_full(self):
+        """容量超過時に古いエントリから削除されるテスト"""
+        index: VectorIndex[int] = VectorIndex(dimension=2, max_entries=10, evict_ratio=0.2)
+        for i in range(12):
+            index.add(np.array([[1.0, float(i)]]), [i])
+
+        assert len(index) <= 10
+        payloads = [payload for _, payload in index.search(np.array([[1.0, 0.0]]), top_k=10)[0]]
+        assert 0 not in payloads
+        assert 11 in payloads
+
+    def test_search_with_where_filters_payloads(self):
+        """条件を満たすエントリのみを返すテスト"""
+        index: VectorIndex[str] = VectorIndex(dimension=2)
+        index.add(np.array([[1.0, 0.0], [0.6, 0.8], [0.0, 1.0]]), ["a:1", "b:1", "a:2"])
+
+        results = index.search(np.array([[1.0, 0.0]]), top_k=3, where=lambda payload: payload.startswith("a:"))
+
+        assert [payload for _, payload in results[0]] == ["a:1", "a:2"]
+        assert index.search(np.array([[1.0, 0.0]]), where=lambda payload: False) == [[]]
+
+    def test_add_rejects_mismatched_shape(self):
+        """ベクトルとペイロードの数が一致しない場合のテスト"""
+        index: VectorIndex[str] = VectorIndex(dimension=2)
+        with pytest.raises(ValueError):
+            index.add(np.array([[1.0, 0.0]]), ["a", "b"])
+
+
+class TestConversationMemory:
+    """会話メモリのテスト"""
+
+    def test_build_context_includes_similar_past_turn(self):
+        """類似する過去のやり取りがコンテキストに含まれるテスト"""
+        memory = ConversationMemory(HashingEmbedder(), min_score=0.3)
+        memory.remember("C1", "Lambdaのタイムアウトを延ばす方法は？", "function.jsonのTimeoutを変更します")
+        memory.remember("C1", "今日のランチのおすすめは？", "カレーはいかがでしょう")
+
+        context = memory.build_context("C1", "Lambdaのタイムアウトを延ばしたい")
+
+        assert "function.jsonのTimeoutを変更します" in context
+        assert "カレー" not in context
+
+    def test_build_context_empty_without_matches(self):
+        """メモリが空の場合は空文字を返すテスト"""
+        memory = ConversationMemory(HashingEmbedder())
+        assert memory.build_context("C1", "こんにちは") == ""
+
+    def test_recall_is_scoped_to_channel(self):
+        """他のチャンネル（プライベートチャンネル・DMを含む）のやり取りを参照しないテスト"""
+        memory = ConversationMemory(HashingEmbedder(), min_score=0.3)
+        memory.remember("D1", "社外秘プロジェクトの予算は？", "予算は1000万円です")
+
+        assert memory.recall("C1", "社外秘プロジェクトの予算は？") == []
+        assert memory.recall("D1", "社外秘プロジェクトの予算は？")[0]["answer"] == "予算は1000万円です"
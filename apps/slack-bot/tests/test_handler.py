@@ -0,0 +1,216 @@
+import pytest
+
+from slack import handler
+from slack.user_directory import UserDirectory
+from usage.ledger import UsageLedger
+from usage.store import SQLiteUsageStore
+
+
+class FakeWebClient:
+    """Slack APIの呼び出しを記録するテスト用クライアント"""
+
+    def __init__(self, token=None):
+        self.calls = []
+
+    def conversations_replies(self, **kwargs):
+        self.calls.append(("conversations_replies", kwargs))
+        return {"ok": True, "messages": []}
+
+    def chat_postMessage(self, **kwargs):  # noqa: N802
+        self.calls.append(("chat_postMessage", kwargs))
+        return {"ok": True, "ts": "1700000000.000200"}
+
+    def chat_postEphemeral(self, **kwargs):  # noqa: N802
+        self.calls.append(("chat_postEphemeral", kwargs))
+        return {"ok": True}
+
+    def chat_update(self, **kwargs):
+        self.calls.append(("chat_update", kwargs))
+        return {"ok": True}
+
+    def auth_test(self):
+        return {"ok": True, "user_id": "UBOT"}
+
+    def users_info(self, user):
+        self.calls.append(("users_info", {"user": user}))
+        return {"ok": True, "user": {"id": user, "profile": {"display_name": user.lower()}}}
+
+    def called(self, method):
+        return [kwargs for name, kwargs in self.calls if name == method]
+
+
+@pytest.fixture
+def slack_client(monkeypatch):
+    client = FakeWebClient()
+    monkeypatch.setattr(handler, "WebClient", lambda token=None: client)
+    return client
+
+
+@pytest.fixture(autouse=True)
+def user_directory(monkeypatch):
+    directory = UserDirectory()
+    monkeypatch.setattr(handler, "get_user_directory", lambda: directory)
+    return directory
+
+
+@pytest.fixture
+def ledger(monkeypatch):
+    ledger = UsageLedger(SQLiteUsageStore(), user_daily_budget=1000, channel_daily_budget=0)
+    monkeypatch.setattr(handler, "get_usage_ledger", lambda: ledger)
+    return ledger
+
+
+@pytest.fixture
+def model_calls(monkeypatch):
+    calls = []
+
+    def fake_strands(user_message, conversation_history=None, on_usage=None, channel=None, memory_query=None):
+        calls.append(("strands", user_message, {"memory_query": memory_query}))
+        on_usage(10, 5)
+        return "strands reply"
+
+    def fake_direct(user_message, conversation_history=None, max_tokens=None, on_usage=None):
+        calls.append(("direct", user_message, {"max_tokens": max_tokens, "history": conversation_history}))
+        on_usage(10, 5)
+        return "direct reply"
+
+    monkeypatch.setattr(handler, "chat_with_strands", fake_strands)
+    monkeypatch.setattr(handler, "chat_with_bedrock_direct", fake_direct)
+    return calls
+
+
+MENTION_EVENT = {"type": "app_mention", "channel": "C1", "user": "U1", "ts": "1700000000.000100", "text": "<@UBOT> hi"}
+
+
+class TestHandleAppMention:
+    """アプリメンション処理のテスト"""
+
+    def test_refuses_when_budget_exceeded(self, slack_client, ledger, model_calls):
+        """予算超過時はモデルを呼ばずに拒否メッセージを返すテスト"""
+        ledger.record("U1", "C1", 1000, 0)
+
+        handler.handle_app_mention(MENTION_EVENT)
+
+        assert model_calls == []
+        posts = slack_client.called("chat_postMessage")
+        assert [post["text"] for post in posts] == [handler.BUDGET_EXCEEDED_MESSAGE]
+
+    def test_uses_fast_path_when_budget_degraded(self, slack_client, ledger, model_calls):
+        """予算の上限が近い場合は出力トークンを制限した直接呼び出しを使うテスト"""
+        ledger.record("U1", "C1", 850, 0)
+
+        handler.handle_app_mention(MENTION_EVENT)
+
+        assert [(kind, message) for kind, message, _ in model_calls] == [("direct", "hi")]
+        assert model_calls[0][2]["max_tokens"] == handler.settings.usage_degraded_max_tokens
+        assert slack_client.called("chat_postMessage")[0]["text"] == "direct reply"
+        assert ledger.usage("user", "U1") == 865
+
+    def test_uses_strands_when_budget_ok(self, slack_client, ledger, model_calls):
+        """予算内の場合はStrands Agentを使うテスト"""
+        handler.handle_app_mention(MENTION_EVENT)
+
+        assert [kind for kind, _, _ in model_calls] == ["strands"]
+        assert model_calls[0][2]["memory_query"] == "hi"
+        assert slack_client.called("chat_postMessage")[0]["text"] == "strands reply"
+        assert ledger.usage("channel", "C1") == 15
+        assert ledger.store.get(("channel", "C1", ledger._today())) == (10, 5)
+
+    def test_top_level_mention_resolves_only_mentioned_users(self, slack_client, ledger, model_calls):
+        """スレッド外のメンションでは発言者を解決せず、メンション先のみを表示名に置換するテスト"""
+        handler.handle_app_mention({**MENTION_EVENT, "text": "<@UBOT> <@U2> に聞いて"})
+
+        assert slack_client.called("users_info") == [{"user": "U2"}]
+        assert model_calls[0][1] == "@u2 に聞いて"
+
+    def test_drops_mentions_when_bot_user_id_unknown(self, slack_client, ledger, model_calls, monkeypatch):
+        """Bot自身のIDが取得できない場合はメンションを解決せず全て除去するテスト"""
+
+        def failing_auth_test():
+            raise RuntimeError("invalid_auth")
+
+        monkeypatch.setattr(slack_client, "auth_test", failing_auth_test)
+
+        handler.handle_app_mention({**MENTION_EVENT, "text": "<@UBOT> <@U2> に聞いて"})
+
+        assert slack_client.called("users_info") == []
+        assert model_calls[0][1] == "に聞いて"
+
+
+BLOCK_ACTION_PAYLOAD = {
+    "type": "block_actions",
+    "user": {"id": "U1"},
+    "channel": {"id": "C1"},
+    "container": {"message_ts": "1700000000.000200"},
+    "message": {"ts": "1700000000.000200", "text": "strands reply"},
+    "actions": [{"action_id": "shorten_reply"}],
+}
+
+
+class TestBlockActions:
+    """アクションボタン処理のテスト"""
+
+    def test_updates_original_message(self, slack_client, ledger, model_calls, monkeypatch):
+        """キャッシュ済みのコンテキストで1回だけ生成して元のメッセージを更新するテスト"""
+        generated = []
+
+        def fake_generate(user_message, conversation_history=None, max_tokens=None, on_usage=None):
+            generated.append((user_message, conversation_history, max_tokens))
+            on_usage(20, 10)
+            return "short reply"
+
+        monkeypatch.setattr(handler, "generate_with_bedrock_direct", fake_generate)
+        handler.handle_app_mention(MENTION_EVENT)
+        slack_client.calls.clear()
+
+        job = handler.prepare_block_action(BLOCK_ACTION_PAYLOAD)
+        handler.process_block_action(job)
+
+        instruction, history, max_tokens = generated[0]
+        assert max_tokens is None
+        assert instruction == handler.REPLY_ACTIONS["shorten_reply"][1]
+        assert history[-2:] == [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "strands reply"}]
+        assert slack_client.called("conversations_replies") == []
+        update = slack_client.called("chat_update")[0]
+        assert (update["ts"], update["text"]) == ("1700000000.000200", "short reply")
+        assert ledger.store.get(("user", "U1", ledger._today())) == (30, 15)
+
+    def test_limits_tokens_when_budget_degraded(self, slack_client, ledger, model_calls, monkeypatch):
+        """予算の上限が近い場合は詳細化でも出力トークンを制限するテスト"""
+        max_tokens_used = []
+
+        def fake_generate(user_message, conversation_history=None, max_tokens=None, on_usage=None):
+            max_tokens_used.append(max_tokens)
+            return "long reply"
+
+        monkeypatch.setattr(handler, "generate_with_bedrock_direct", fake_generate)
+        handler.handle_app_mention(MENTION_EVENT)
+        ledger.record("U1", "C1", 850, 0)
+
+        job = handler.prepare_block_action({**BLOCK_ACTION_PAYLOAD, "actions": [{"action_id": "expand_reply"}]})
+        handler.process_block_action(job)
+
+        assert job["budget_status"] == "degraded"
+        assert max_tokens_used == [handler.settings.usage_degraded_max_tokens]
+
+    def test_keeps_original_message_on_failure(self, slack_client, ledger, model_calls, monkeypatch):
+        """生成に失敗した場合は元のメッセージを残して本人にのみ通知するテスト"""
+
+        def failing_generate(*args, **kwargs):
+            raise RuntimeError("ThrottlingException")
+
+        monkeypatch.setattr(handler, "generate_with_bedrock_direct", failing_generate)
+        handler.handle_app_mention(MENTION_EVENT)
+        slack_client.calls.clear()
+
+        handler.process_block_action(handler.prepare_block_action(BLOCK_ACTION_PAYLOAD))
+
+        assert slack_client.called("chat_update") == []
+        assert slack_client.called("chat_postEphemeral")[0]["user"] == "U1"
+
+    def test_prepare_without_cached_context(self, slack_client, ledger):
+        """キャッシュがない場合はジョブを作らず本人に通知するテスト"""
+        payload = {**BLOCK_ACTION_PAYLOAD, "container": {"message_ts": "1600000000.000000"}, "message": {}}
+
+        assert handler.prepare_block_action(payload) is None
+        assert len(slack_client.called("chat_postEphemeral")) == 1
@@ -0,0 +1,52 @@
+import json
+
+import lambda_function
+
+
+class FakeLambdaClient:
+    """Lambda非同期呼び出しを記録するテスト用クライアント"""
+
+    def __init__(self):
+        self.invocations = []
+
+    def invoke(self, **kwargs):
+        self.invocations.append(kwargs)
+        return {"StatusCode": 202}
+
+
+class TestBlockActionDispatch:
+    """アクションボタンのジョブの非同期処理のテスト"""
+
+    def test_dispatch_invokes_self_asynchronously(self, monkeypatch):
+        """Lambda環境では自分自身を非同期に呼び出すテスト"""
+        client = FakeLambdaClient()
+        monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "slack-bot-dev")
+        monkeypatch.setattr(lambda_function, "_lambda_client", client)
+
+        lambda_function.dispatch_block_action({"action_id": "expand_reply"})
+
+        invocation = client.invocations[0]
+        assert invocation["FunctionName"] == "slack-bot-dev"
+        assert invocation["InvocationType"] == "Event"
+        assert json.loads(invocation["Payload"]) == {"block_action_job": {"action_id": "expand_reply"}}
+
+    def test_handler_processes_job_event(self, monkeypatch):
+        """自己非同期呼び出しのイベントでジョブを処理するテスト"""
+        processed = []
+        monkeypatch.setattr(lambda_function, "process_block_action", processed.append)
+
+        response = lambda_function.lambda_handler({"block_action_job": {"action_id": "expand_reply"}}, None)
+
+        assert response["statusCode"] == 200
+        assert processed == [{"action_id": "expand_reply"}]
+
+    def test_handler_ignores_job_key_from_function_url(self, monkeypatch):
+        """Function URLsからのリクエストではジョブとして扱わないテスト"""
+        processed = []
+        monkeypatch.setattr(lambda_function, "process_block_action", processed.append)
+
+        event = {"block_action_job": {"action_id": "expand_reply"}, "requestContext": {"http": {"method": "GET"}}}
+        response = lambda_function.lambda_handler(event, None)
+
+        assert response["statusCode"] == 405
+        assert processed == []
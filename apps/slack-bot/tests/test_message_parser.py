@@ -1,4 +1,9 @@
-from slack.message_parser import extract_clean_message, format_thread_history_for_display, parse_thread_history_for_ai
+from slack.message_parser import (
+    collect_user_ids,
+    extract_clean_message,
+    format_thread_history_for_display,
+    parse_thread_history_for_ai,
+)
 
 
 class TestMessageParser:
@@ -36,6 +41,47 @@ class TestMessageParser:
         assert result[1] == {"role": "assistant", "content": "こんにちは！お手伝いします"}
         assert result[2] == {"role": "user", "content": "ありがとう"}
 
+    def test_extract_clean_message_with_user_names(self):
+        """メンションを表示名に置換するテスト"""
+        user_names = {"U87654321": "tanaka"}
+
+        text = "<@U12345678> <@U87654321|tanaka> さんに確認してください"
+        result = extract_clean_message(text, user_names)
+        assert result == "@tanaka さんに確認してください"
+
+    def test_parse_thread_history_for_ai_with_user_names(self):
+        """発言者名付きのAI用変換テスト"""
+        messages = [
+            {"text": "<@UBOT> デプロイ手順は？", "user": "U1"},
+            {"text": "deploy.shを実行します", "bot_id": "B12345678"},
+            {"text": "<@UBOT> <@U1> の環境ではどうなる？", "user": "U2"},
+        ]
+        user_names = {"U1": "sato", "U2": "suzuki"}
+
+        result = parse_thread_history_for_ai(messages, user_names)
+
+        assert result == [
+            {"role": "user", "content": "sato: デプロイ手順は？"},
+            {"role": "assistant", "content": "deploy.shを実行します"},
+            {"role": "user", "content": "suzuki: @sato の環境ではどうなる？"},
+        ]
+
+        result = parse_thread_history_for_ai(messages, user_names, render_mentions=False)
+
+        assert result[2] == {"role": "user", "content": "suzuki: の環境ではどうなる？"}
+
+    def test_collect_user_ids(self):
+        """発言者とメンションのユーザーID収集テスト"""
+        messages = [
+            {"text": "<@UBOT> hello", "user": "U1"},
+            {"text": "hi <@U2>", "bot_id": "B1", "user": "UBOT"},
+            {"text": "<@U1> thanks", "user": "U2"},
+        ]
+
+        assert collect_user_ids(messages) == ["U1", "UBOT", "U2"]
+        assert collect_user_ids(messages, include_mentions=False) == ["U1", "U2"]
+        assert collect_user_ids(messages, include_speakers=False) == ["UBOT", "U2", "U1"]
+
     def test_parse_thread_history_for_ai_empty_messages(self):
         """空のメッセージリストのテスト"""
         messages = []
@@ -0,0 +1,72 @@
+import hashlib
+import hmac
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.profiling import profile_invocation, verify_debug_flag
+
+
+def _sign(secret: str, timestamp: str) -> str:
+    return hmac.new(secret.encode(), f"profile:{timestamp}".encode(), hashlib.sha256).hexdigest()
+
+
+class TestVerifyDebugFlag:
+    """デバッグフラグ検証のテスト"""
+
+    def test_valid_flag(self):
+        """有効なフラグのテスト"""
+        timestamp = str(int(time.time()))
+        assert verify_debug_flag("secret", f"{timestamp}:{_sign('secret', timestamp)}") is True
+
+    def test_invalid_flags(self):
+        """無効なフラグのテスト"""
+        timestamp = str(int(time.time()))
+        old_timestamp = str(int(time.time()) - 600)
+
+        assert verify_debug_flag(None, f"{timestamp}:{_sign('secret', timestamp)}") is False
+        assert verify_debug_flag("secret", f"{timestamp}:{_sign('other', timestamp)}") is False
+        assert verify_debug_flag("secret", f"{old_timestamp}:{_sign('secret', old_timestamp)}") is False
+        assert verify_debug_flag("secret", "not-a-flag") is False
+
+
+class TestProfileInvocation:
+    """プロファイリングのテスト"""
+
+    def test_disabled_logs_nothing(self, caplog):
+        """無効時はサマリーを出力しないテスト"""
+        with caplog.at_level(logging.INFO, logger="utils.profiling"):
+            with profile_invocation(False, "req-1"):
+                sum(range(1000))
+
+        assert caplog.records == []
+
+    def test_enabled_logs_summary_and_dumps_pstats(self, caplog, tmp_path):
+        """有効時にサマリーとpstatsファイルを出力するテスト"""
+        with caplog.at_level(logging.INFO, logger="utils.profiling"):
+            with profile_invocation(True, "req-2", dump_dir=str(tmp_path), top_n=5):
+                data = [str(i) * 10 for i in range(1000)]
+                sorted(data)
+
+        summary = json.loads(caplog.records[-1].getMessage())
+        assert summary["profile"] == "req-2"
+        assert summary["peak_memory_kib"] > 0
+        assert 0 < len(summary["top_cumulative"]) <= 5
+        assert len(summary["top_allocations"]) <= 5
+        assert (tmp_path / "profile-req-2.pstats").exists()
+
+    def test_profiles_worker_threads(self, caplog):
+        """ブロック開始前に起動済みのワーカースレッドで実行した関数も計測されるテスト"""
+
+        def worker_task():
+            return sorted(str(i) for i in range(20000))
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(lambda: None).result()
+            with caplog.at_level(logging.INFO, logger="utils.profiling"):
+                with profile_invocation(True, "req-3", top_n=50):
+                    executor.submit(worker_task).result()
+
+        summary = json.loads(caplog.records[-1].getMessage())
+        assert any("worker_task" in entry["function"] for entry in summary["top_cumulative"])
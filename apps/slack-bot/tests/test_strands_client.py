@@ -0,0 +1,127 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from ai.bedrock_invoker import BedrockInvoker, BedrockTarget
+from ai.strands_client import StrandsClient
+from memory.conversation_memory import ConversationMemory
+from memory.embedder import HashingEmbedder
+
+TARGET = BedrockTarget("ap-northeast-1", "apac.model")
+
+
+def _result(input_tokens, output_tokens, content=""):
+    """accumulated_usageを持つAgentResult相当のオブジェクト"""
+    usage = {"inputTokens": input_tokens, "outputTokens": output_tokens}
+    return SimpleNamespace(content=content, metrics=SimpleNamespace(accumulated_usage=usage))
+
+
+class TestStrandsClientUsage:
+    """トークン使用量の差分計算のテスト"""
+
+    def test_usage_delta_reports_per_call_usage(self):
+        """Agentの累計から今回の呼び出し分だけを返すテスト"""
+        client = StrandsClient.__new__(StrandsClient)
+        client._usage_totals = {}
+        client._usage_lock = threading.Lock()
+
+        assert client._usage_delta(TARGET, _result(100, 20)) == (100, 20)
+        assert client._usage_delta(TARGET, _result(250, 50)) == (150, 30)
+        assert client._usage_delta(BedrockTarget("us-east-1", "us.model"), _result(40, 10)) == (40, 10)
+
+    def test_chat_reports_usage_of_hedged_loser(self):
+        """ヘッジで採用されなかった呼び出しの使用量も通知するテスト"""
+        slow_target = BedrockTarget("us-east-1", "us.model")
+
+        def slow_agent(prompt):
+            time.sleep(0.2)
+            return _result(100, 20, "slow")
+
+        client = StrandsClient.__new__(StrandsClient)
+        client.invoker = BedrockInvoker([slow_target, TARGET], hedge_initial_delay=0.05)
+        client.agents = {slow_target: slow_agent, TARGET: lambda prompt: _result(40, 10, "fast")}
+        client._agent_locks = {target: threading.Lock() for target in client.agents}
+        client._usage_totals = {}
+        client._usage_lock = threading.Lock()
+        client.memory = None
+        usages = []
+
+        assert client.chat("hi", on_usage=lambda i, o: usages.append((i, o))) == "fast"
+
+        time.sleep(0.3)
+        assert sorted(usages) == [(40, 10), (100, 20)]
+
+
+class TestStrandsClientPrompt:
+    """プロンプト組み立てのテスト"""
+
+    def test_chat_includes_thread_history_and_resets_agent(self):
+        """スレッドの会話履歴をプロンプトに含め、以前の会話を持ち越さないテスト"""
+        prompts = []
+
+        def agent(prompt):
+            prompts.append((prompt, list(agent.messages)))
+            agent.messages.append({"role": "user", "content": [{"text": prompt}]})
+            return _result(10, 5, "answer")
+
+        agent.messages = [{"role": "user", "content": [{"text": "別スレッドの質問"}]}]
+        client = StrandsClient.__new__(StrandsClient)
+        client.invoker = BedrockInvoker([TARGET])
+        client.agents = {TARGET: agent}
+        client._agent_locks = {TARGET: threading.Lock()}
+        client._usage_totals = {}
+        client._usage_lock = threading.Lock()
+        client.memory = None
+        history = [
+            {"role": "user", "content": "sato: デプロイ手順は？"},
+            {"role": "assistant", "content": "deploy.shを実行します"},
+        ]
+
+        assert client.chat("suzuki: 本番でも同じ？", history) == "answer"
+
+        prompt, messages = prompts[0]
+        assert messages == []
+        assert prompt == (
+            "このスレッドのこれまでの会話:\n"
+            "[user] sato: デプロイ手順は？\n"
+            "[assistant] deploy.shを実行します\n\n"
+            "質問: suzuki: 本番でも同じ？"
+        )
+
+
+class FailingEmbedder:
+    """埋め込みの取得に常に失敗するEmbedder"""
+
+    dimension = 8
+
+    def embed(self, texts):
+        raise RuntimeError("AccessDeniedException")
+
+
+class TestStrandsClientMemory:
+    """会話メモリのテスト"""
+
+    def _client(self, memory):
+        client = StrandsClient.__new__(StrandsClient)
+        client.invoker = BedrockInvoker([TARGET])
+        client.agents = {TARGET: lambda prompt: _result(10, 5, f"answer to {prompt}")}
+        client._agent_locks = {TARGET: threading.Lock()}
+        client._usage_totals = {}
+        client._usage_lock = threading.Lock()
+        client.memory = memory
+        return client
+
+    def test_chat_answers_when_memory_fails(self):
+        """会話メモリの検索・記録に失敗しても回答を返すテスト"""
+        client = self._client(ConversationMemory(FailingEmbedder()))
+
+        assert client.chat("hi", channel="C1") == "answer to hi"
+
+    def test_chat_stores_memory_query(self):
+        """発言者名を除いた質問をメモリに記録するテスト"""
+        memory = ConversationMemory(HashingEmbedder(), min_score=0.3)
+        client = self._client(memory)
+
+        client.chat("sato: デプロイ手順は？", channel="C1", memory_query="デプロイ手順は？")
+
+        assert [entry["question"] for entry in memory.recall("C1", "デプロイ手順は？")] == ["デプロイ手順は？"]
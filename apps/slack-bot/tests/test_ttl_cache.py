@@ -0,0 +1,40 @@
+from utils.ttl_cache import TTLCache
+
+
+class FakeClock:
+    """テスト用の時刻"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTTLCache:
+    """TTLキャッシュのテスト"""
+
+    def test_get_returns_value_until_expired(self):
+        """有効期限までは値を返すテスト"""
+        clock = FakeClock()
+        cache: TTLCache[str, str] = TTLCache(ttl=10, clock=clock)
+        cache.set("a", "value")
+
+        clock.now = 9
+        assert cache.get("a") == "value"
+
+        clock.now = 10
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used(self):
+        """最大件数を超えると最も参照されていないエントリを削除するテスト"""
+        cache: TTLCache[str, int] = TTLCache(ttl=60, max_entries=2, clock=FakeClock())
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
@@ -0,0 +1,82 @@
+from usage.ledger import UsageLedger
+from usage.store import SQLiteUsageStore
+
+# 2025-01-01 00:00:00 UTC
+JAN_1 = 1735689600.0
+
+
+class FakeClock:
+    """テスト用の時刻"""
+
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestSQLiteUsageStore:
+    """SQLiteストアのテスト"""
+
+    def test_add_accumulates_deltas(self):
+        """差分が加算されるテスト"""
+        store = SQLiteUsageStore()
+        key = ("user", "U1", "2025-01-01")
+
+        store.add({key: (10, 5)})
+        store.add({key: (3, 2)})
+
+        assert store.get(key) == (13, 7)
+        assert store.get(("user", "U2", "2025-01-01")) == (0, 0)
+
+
+class TestUsageLedger:
+    """トークン使用量台帳のテスト"""
+
+    def test_record_buffers_until_threshold(self):
+        """閾値に達するまでストアへ書き戻さないテスト"""
+        store = SQLiteUsageStore()
+        ledger = UsageLedger(store, flush_threshold=4, clock=FakeClock(JAN_1))
+
+        ledger.record("U1", "C1", 100, 50)
+        assert store.get(("user", "U1", "2025-01-01")) == (0, 0)
+        assert ledger.usage("user", "U1") == 150
+
+        # user/channelの2キー x 2で閾値に到達
+        ledger.record("U2", "C2", 10, 10)
+        assert store.get(("user", "U1", "2025-01-01")) == (100, 50)
+        assert store.get(("channel", "C2", "2025-01-01")) == (10, 10)
+
+    def test_check_budget(self):
+        """予算に応じた判定のテスト"""
+        ledger = UsageLedger(SQLiteUsageStore(), user_daily_budget=1000, channel_daily_budget=0, clock=FakeClock(JAN_1))
+
+        assert ledger.check_budget("U1", "C1") == "ok"
+
+        ledger.record("U1", "C1", 700, 100)
+        assert ledger.check_budget("U1", "C1") == "degraded"
+
+        ledger.record("U1", "C1", 200, 0)
+        assert ledger.check_budget("U1", "C1") == "exceeded"
+
+        # 他のユーザーは影響を受けない
+        assert ledger.check_budget("U2", "C1") == "ok"
+
+    def test_budget_resets_next_day(self):
+        """日付が変わると使用量がリセットされるテスト"""
+        clock = FakeClock(JAN_1)
+        ledger = UsageLedger(SQLiteUsageStore(), channel_daily_budget=100, clock=clock)
+
+        ledger.record("U1", "C1", 100, 0)
+        assert ledger.check_budget("U1", "C1") == "exceeded"
+
+        clock.now += 24 * 60 * 60
+        assert ledger.check_budget("U1", "C1") == "ok"
+
+    def test_totals_loaded_from_store(self):
+        """別インスタンスで書き戻した使用量を読み込むテスト"""
+        store = SQLiteUsageStore()
+        UsageLedger(store, clock=FakeClock(JAN_1), flush_threshold=1).record("U1", "C1", 30, 20)
+
+        ledger = UsageLedger(store, clock=FakeClock(JAN_1))
+        assert ledger.usage("channel", "C1") == 50
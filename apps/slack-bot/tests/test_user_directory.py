@@ -0,0 +1,70 @@
+from slack.user_directory import UserDirectory, get_display_name
+
+
+class FakeSlackClient:
+    """users.info / auth.test を記録するテスト用クライアント"""
+
+    def __init__(self, users):
+        self.users = users
+        self.users_info_calls = []
+        self.auth_test_calls = 0
+
+    def users_info(self, user):
+        self.users_info_calls.append(user)
+        if user not in self.users:
+            raise RuntimeError("user_not_found")
+        return {"ok": True, "user": self.users[user]}
+
+    def auth_test(self):
+        self.auth_test_calls += 1
+        return {"ok": True, "user_id": "UBOT"}
+
+
+class TestUserDirectory:
+    """ユーザー表示名解決のテスト"""
+
+    def test_get_display_name_fallbacks(self):
+        """表示名のフォールバック順のテスト"""
+        assert get_display_name({"id": "U1", "profile": {"display_name": "taro", "real_name": "Taro Y"}}) == "taro"
+        assert get_display_name({"id": "U1", "profile": {"display_name": "", "real_name": "Taro Y"}}) == "Taro Y"
+        assert get_display_name({"id": "U1", "name": "taro.y"}) == "taro.y"
+
+    def test_resolve_deduplicates_and_caches(self):
+        """重複を除いて取得し、2回目以降はキャッシュを使うテスト"""
+        client = FakeSlackClient(
+            {
+                "U1": {"id": "U1", "profile": {"display_name": "sato"}},
+                "U2": {"id": "U2", "profile": {"display_name": "suzuki"}},
+            }
+        )
+        directory = UserDirectory()
+
+        assert directory.resolve(client, ["U1", "U2", "U1"]) == {"U1": "sato", "U2": "suzuki"}
+        assert sorted(client.users_info_calls) == ["U1", "U2"]
+
+        assert directory.resolve(client, ["U2"]) == {"U2": "suzuki"}
+        assert len(client.users_info_calls) == 2
+
+    def test_resolve_skips_failed_lookups(self):
+        """取得に失敗したユーザーは結果に含めないテスト"""
+        client = FakeSlackClient({"U1": {"id": "U1", "profile": {"display_name": "sato"}}})
+
+        assert UserDirectory().resolve(client, ["U1", "UX"]) == {"U1": "sato"}
+
+    def test_resolve_caches_failed_lookups(self):
+        """取得に失敗したユーザーは有効期限内は再取得しないテスト"""
+        client = FakeSlackClient({})
+        directory = UserDirectory(failure_ttl=300)
+
+        assert directory.resolve(client, ["UX"]) == {}
+        assert directory.resolve(client, ["UX"]) == {}
+        assert client.users_info_calls == ["UX"]
+
+    def test_bot_user_id_is_cached(self):
+        """Bot自身のユーザーIDを1回だけ取得するテスト"""
+        client = FakeSlackClient({})
+        directory = UserDirectory()
+
+        assert directory.bot_user_id(client) == "UBOT"
+        assert directory.bot_user_id(client) == "UBOT"
+        assert client.auth_test_calls == 1
@@ -107,6 +107,7 @@ resource "aws_iam_role_policy" "bedrock_policy" {
         ]
         Resource = [
           "arn:aws:bedrock:*:*:foundation-model/anthropic.claude-*",
+          "arn:aws:bedrock:*:*:foundation-model/amazon.titan-embed-*",
           "arn:aws:bedrock:*:*:inference-profile/*"
         ]
       }
@@ -114,6 +115,27 @@ resource "aws_iam_role_policy" "bedrock_policy" {
   })
 }
 
+# 自己非同期呼び出し権限（Interactive Componentsを3秒以内に応答してから処理するため）
+resource "aws_iam_role_policy" "self_invoke_policy" {
+  name = "${var.function_name}-${var.environment}-self-invoke-policy"
+  role = aws_iam_role.lambda_execution_role.id
+  
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Effect = "Allow"
+        Action = [
+          "lambda:InvokeFunction"
+        ]
+        Resource = [
+          aws_lambda_function.slack_bot.arn
+        ]
+      }
+    ]
+  })
+}
+
 # CloudWatch Log Group
 resource "aws_cloudwatch_log_group" "lambda_logs" {
   name              = "/aws/lambda/${var.function_name}-${var.environment}"